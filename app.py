@@ -1,72 +1,279 @@
+import inspect
+import os
+import threading
+
 import streamlit as st
 import pandas as pd
 
-import preprocess.preprocess as preprocess
+import preprocess.backends as backends
+import preprocess.dataset as dataset
 import preprocess.sport as sport
-import visualizations.scatter_charts as scatter_charts
-import visualizations.sankey_diagrams as sankey_diagrams
-import visualizations.bubble_chart as bubble_chart
-import visualizations.connected_dot_plot as connected_dot_plot
-import visualizations.stacked_bar_chart as stacked_bar_chart
-import visualizations.bar_chart as bar_chart
-from preprocess.preprocess import AGE_MIDPOINTS
-
-@st.cache_data
+import visualizations.figures as figures
+import visualizations.figure_cache as figure_cache
+import visualizations.warm_up as warm_up
+import monitoring.timing as timing
+
+# On-demand mode: a section is only computed once its expander is opened.
+# Set OLYMPICS_LAZY_SECTIONS=0 to compute every section on each rerun.
+# Lazy expanders need a Streamlit version supporting st.expander(on_change=...)
+LAZY_SECTIONS = (os.environ.get('OLYMPICS_LAZY_SECTIONS', '1') != '0'
+                 and 'on_change' in inspect.signature(st.expander).parameters)
+
+# Per-section timings, shown in a debug panel and logged as one JSON line per rerun.
+# Enabled for every session with OLYMPICS_TIMINGS=1, or for one session with ?timings=1
+TIMINGS = os.environ.get('OLYMPICS_TIMINGS', '0') == '1'
+
+# Backend running the preprocessing of the data and of the figures: pandas (default), sql or polars.
+# Set with OLYMPICS_BACKEND, see preprocess/backends.py
+BACKEND = backends.load_backend()
+
+# Once the data is loaded, a background thread fills the figure cache for every sport
+# with the default widget values. Set OLYMPICS_WARM_UP=0 to disable it
+WARM_UP = os.environ.get('OLYMPICS_WARM_UP', '1') != '0'
+
+@st.cache_resource
 def prep_data():
     '''
-        Imports the .csv file and does some preprocessing.
+        Imports the .csv file, does some preprocessing and derives the tables used by the charts,
+        see dataset.load_dataset.
+        The data is shared by all the sessions and must not be modified, the
+        editions added later are merged into a new dataset by refresh_data.
 
         Returns:
-            A pandas dataframe containing the preprocessed data.
+            A holder of the current dataset (see dataset.build_dataset), prepared by the backend, with the
+            lock serializing the merges and the rejected edition files.
+    '''
+    current, rejected = dataset.load_dataset(BACKEND.load_athletes)
+    return {"dataset": BACKEND.prepare(current), "lock": threading.Lock(), "rejected": rejected}
+
+def stop_warm_up(holder):
+    '''
+        Cancels the warm-up and waits for its current builder, so that it does
+        not store a figure once the cache is cleared.
+
+        Args:
+            holder: The holder returned by prep_data
     '''
-    olympics_data_unprocessed = pd.read_csv('./assets/data/all_athlete_games.csv')
-    regions_data = pd.read_csv('./assets/data/all_regions.csv')
-    olympics_dataframe = preprocess.convert_age(olympics_data_unprocessed)
-    olympics_dataframe = preprocess.normalize_events(olympics_dataframe)
-    olympics_dataframe = preprocess.normalize_countries(olympics_dataframe, regions_data)
-    
-    return olympics_dataframe, regions_data
+    running = holder.pop("warm_up", None)
+    if running is not None:
+        running.cancel()
+        running.join()
+
+def refresh_data(holder):
+    '''
+        Merges the edition files added or refreshed since the last rerun into the
+        shared dataset, then clears the figures built from the previous data.
+
+        Args:
+            holder: The holder returned by prep_data
+        Returns:
+            The current dataset.
+    '''
+    editions = dataset.edition_files()
+    if dataset.pending_editions(holder["dataset"], editions, holder["rejected"]):
+        with holder["lock"]:
+            current = dataset.merge_new_editions(holder["dataset"], editions, holder["rejected"])
+            if current is not holder["dataset"]:
+                # The warm-up builds the figures of the previous data, it is restarted by start_warm_up
+                stop_warm_up(holder)
+                holder["dataset"] = BACKEND.prepare(current)
+                dataset.write_dataset_snapshot(current, editions, holder["rejected"])
+                figure_cache.FIGURE_CACHE.clear()
+    return holder["dataset"]
 
 # Load the data
 header_image_path = './assets/images/header_image.png'
-olympics_data, regions_data = prep_data()
+data_holder = prep_data()
+current_dataset = refresh_data(data_holder)
+# The values of the widgets, computed once per dataset (see preprocess.build_catalog)
+catalog = current_dataset["catalog"]
 
-def main():
-    # ---------------------------
-    # Sidebar: User Inputs
-    # ---------------------------
-    st.sidebar.image(header_image_path, width=200)
-    st.sidebar.title("Please provide the following details : ")
-    discipline = st.sidebar.selectbox("Select a discipline", ["None"] + [sport.value for sport in sport.Sport])
-    country_options = ["None"] + sorted(olympics_data["Region"].dropna().unique().tolist())
-    user_country_name = st.sidebar.selectbox("Select your country", country_options)
-    user_country = preprocess.get_noc_from_country(user_country_name, regions_data)
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("[![GitHub](https://img.icons8.com/ios-glyphs/30/ffffff/github.png)](https://github.com/Mahacine/INF8808_Projet_Eq7) Developed by Team 7 : ")
-    st.sidebar.code("Rima Al Zawahra 2023119\nIman Bouara 1990495\nAlexis Desforges 2146454\nMahacine Ettahri 2312965\nNeda Khoshnoudi 2252125\nNicolas Lopez 2143179")
+def dataset_version():
+    '''
+        Returns the version of the current dataset, part of the keys of the cached figures,
+        so that a figure built from the data before a merge is not served after it.
 
-    # ---------------------------
-    # Data Filtering
-    # ---------------------------
-    if discipline != "None":
-        filtered_discipline_data = olympics_data[olympics_data["Sport"] == discipline]
+        Returns:
+            The signatures of the edition files merged in the dataset.
+    '''
+    return current_dataset["editions"]
 
-    # Header
-    st.title("Welcome to our Olympics Data Exploration and Visualization App")
-    st.write(f"You have selected athletes from "
-             f"{user_country_name if user_country_name != 'None' else 'all countries'} in "
-             f"{discipline if discipline != 'None' else 'all disciplines'}.")
+# ---------------------------
+# Visualization builders
+# Each one runs the builder of a section (see visualizations/figures.py) on the current
+# dataset and is cached on exactly the widget inputs of that section and the version of
+# the dataset (see dataset_version). The cache stores the figures' JSON and is shared
+# by all the sessions of the process
+# ---------------------------
 
-    # ===========================
-    # Visualization 1
-    # Q1: Quel est l'âge moyen des athlètes dans ma discipline et comment a-t-il évolué au fil du temps ?
-    # Q2: Quelle est la répartition de chaque catégorie d'âge ?
-    # ===========================
-    if discipline != "None":
-        st.subheader(f"Age group distribution and average age of athletes in {discipline}:")
-    else:
-        st.subheader("Age group distribution and average age of athletes in my discipline :")
-     
+@figure_cache.cached_figure(version=dataset_version)
+def build_age_distribution_figure(discipline, mode, show_avg):
+    '''
+        Builds the age distribution bubble chart (Visualization 1).
+
+        Returns:
+            The figure, or None if there is no data for the discipline.
+    '''
+    return figures.build_age_distribution_figure(BACKEND, current_dataset, discipline, mode, show_avg)
+
+@figure_cache.cached_figure(version=dataset_version)
+def build_event_age_figure(discipline, event_selected, mode_event):
+    '''
+        Builds the age scatter plot of a sub-category (Visualization 2).
+
+        Returns:
+            The figure, or None if there is no data for the event.
+    '''
+    return figures.build_event_age_figure(BACKEND, current_dataset, discipline, event_selected, mode_event)
+
+@figure_cache.cached_figure(version=dataset_version)
+def build_medal_age_figure(discipline):
+    '''
+        Builds the medal by age group bubble chart (Visualization 3).
+
+        Returns:
+            The figure, or None if there is no medal data for the discipline.
+    '''
+    return figures.build_medal_age_figure(BACKEND, current_dataset, discipline)
+
+@figure_cache.cached_figure(version=dataset_version)
+def build_sankey_figure(discipline, user_country, participation_year, is_relative):
+    '''
+        Builds the performance Sankey diagram (Visualization 4).
+
+        Returns:
+            The figure (None if there is no data) and whether the country has data.
+    '''
+    return figures.build_sankey_figure(BACKEND, current_dataset, discipline, user_country, participation_year, is_relative)
+
+@figure_cache.cached_figure(version=dataset_version)
+def build_gender_dot_plot_figure(discipline):
+    '''
+        Builds the gender disparities connected dot plot (Visualization 5).
+
+        Returns:
+            The figure, or None if the discipline lacks men's or women's events.
+    '''
+    return figures.build_gender_dot_plot_figure(BACKEND, current_dataset, discipline)
+
+@figure_cache.cached_figure(version=dataset_version)
+def build_gender_by_year_figure(discipline):
+    '''
+        Builds the gender participation stacked bar chart (Visualization 6).
+
+        Returns:
+            The figure.
+    '''
+    return figures.build_gender_by_year_figure(BACKEND, current_dataset, discipline)
+
+@figure_cache.cached_figure(version=dataset_version)
+def build_participation_medal_figure(discipline):
+    '''
+        Builds the medal odds by participation bar chart (Visualization 7).
+
+        Returns:
+            The figure.
+    '''
+    return figures.build_participation_medal_figure(BACKEND, current_dataset, discipline)
+
+@figure_cache.cached_figure(version=dataset_version)
+def build_career_span_figure(discipline):
+    '''
+        Builds the age range per sport connected dot plot (Visualization 8).
+
+        Returns:
+            The figure.
+    '''
+    return figures.build_career_span_figure(BACKEND, current_dataset, discipline)
+
+@figure_cache.cached_figure(version=dataset_version)
+def build_hall_of_fame_figure(discipline):
+    '''
+        Builds the hall of fame stacked bar chart (Visualization 9).
+
+        Returns:
+            The figure.
+    '''
+    return figures.build_hall_of_fame_figure(BACKEND, current_dataset, discipline)
+
+def warm_up_jobs():
+    '''
+        Lists the figures built by the warm-up: the sections of every sport with
+        the default widget values. The Sankey diagram depends on the country and
+        is left out.
+
+        Returns:
+            The jobs of the warm-up, see warm_up.WarmUp
+    '''
+    builders = [
+        (build_age_distribution_figure, ("Absolute", False)),
+        (build_event_age_figure, ("All", "Absolute")),
+        (build_medal_age_figure, ()),
+        (build_gender_dot_plot_figure, ()),
+        (build_gender_by_year_figure, ()),
+        (build_participation_medal_figure, ()),
+        (build_career_span_figure, ()),
+        (build_hall_of_fame_figure, ()),
+    ]
+    return [(discipline.value, builder.prefetch, (discipline.value,) + arguments)
+            for discipline in sport.Sport for builder, arguments in builders]
+
+def start_warm_up(holder):
+    '''
+        Starts the warm-up of the figure cache, once per dataset.
+        The builders of this rerun use the current dataset, so a rerun started
+        before a merge does not start the warm-up.
+
+        Args:
+            holder: The holder returned by prep_data
+        Returns:
+            The warm-up, or None if it is disabled
+    '''
+    if not WARM_UP:
+        return None
+    with holder["lock"]:
+        if "warm_up" not in holder and holder["dataset"] is current_dataset:
+            holder["warm_up"] = warm_up.WarmUp(warm_up_jobs()).start()
+        return holder.get("warm_up")
+
+def show_warm_up(running):
+    '''
+        Shows the progress of the warm-up in the sidebar while it runs.
+
+        Args:
+            running: The warm-up, see start_warm_up
+    '''
+    if running is None:
+        return
+    progress = running.progress()
+    if progress["state"] == "running":
+        st.sidebar.progress(progress["done"] / progress["total"],
+                            text=f"Preparing the figures of every sport ({progress['current']})...")
+
+def open_section(title, key, expanded=False):
+    '''
+        Opens the expander of a visualization section.
+        In on-demand mode, the content of the section is only computed once the
+        user opens its expander.
+
+        Args:
+            title: The title of the section
+            key: The key identifying the section
+            expanded: Whether the section is initially open
+        Returns:
+            The expander, or None if the section is closed and must not be computed.
+    '''
+    if not LAZY_SECTIONS:
+        return st.expander(title, expanded=True)
+    expander = st.expander(title, expanded=expanded, key=f"section_{key}", on_change="rerun")
+    return expander if expander.open else None
+
+# ===========================
+# Visualization 1
+# Q1: Quel est l'âge moyen des athlètes dans ma discipline et comment a-t-il évolué au fil du temps ?
+# Q2: Quelle est la répartition de chaque catégorie d'âge ?
+# ===========================
+def render_age_distribution(discipline):
     # If a discipline is selected, filter the data and show the visualization   
     if discipline != "None":
         # Allow the user to select the mode (absolute vs relative)
@@ -74,83 +281,66 @@ def main():
         # Allow the user to show the average age line
         show_avg = st.checkbox("Show Average Age", key="show_avg_age")
         # Prepare data for visualization 1
-        data_plot = preprocess.add_age_group(filtered_discipline_data)
-        if data_plot.empty:
+        with timing.phase("figure"):
+            fig1 = build_age_distribution_figure(discipline, mode, show_avg)
+        if fig1 is None:
             st.info("No data available for the selected filters and age.")
         else:
-            grouped = data_plot.groupby(["Year", "Age Group"]).size().reset_index(name="Count")
-            grouped["Age_Midpoint"] = grouped["Age Group"].map(AGE_MIDPOINTS)
-
-            grouped, size_column = preprocess.compute_relative_size_column(grouped, mode)
-            fig1 = scatter_charts.create_age_distribution_bubble(data_plot, grouped, size_column, show_avg, mode)
-            st.plotly_chart(fig1, key="fig1")
+            with timing.phase("plotly_chart"):
+                st.plotly_chart(fig1, key="fig1")
     else:
         st.info("Please select a discipline to view the age distribution and average age over time.")
 
-    # ===========================
-    # Visualization 2
-    # Q4: Comment l'âge des athlètes évolue-t-il selon les sous-catégories de ma discipline ?
-    # ===========================
-    if discipline != "None":
-        st.subheader(f"Age evolution of athletes across subcategories in {discipline} :")
-    else:
-        st.subheader("Age evolution of athletes across subcategories in my discipline :")
-    
+# ===========================
+# Visualization 2
+# Q4: Comment l'âge des athlètes évolue-t-il selon les sous-catégories de ma discipline ?
+# ===========================
+def render_event_age(discipline):
     # If a discipline is selected, filter the data and show the visualization 
     if discipline != "None":
         # Allow user to select a sub-category
-        events = filtered_discipline_data["Event"].unique().tolist()
+        events = catalog["events"].get(discipline, [])
         event_selected = st.selectbox("Select a sub-category (Event)", ["All"] + events, key="event_select")
         
-        data_event = filtered_discipline_data.copy()
-        if event_selected != "All":
-            data_event = data_event[data_event["Event"] == event_selected]
-        
-        if data_event.empty:
+        # The selected event comes from the discipline's events, it only lacks data if the discipline does
+        if discipline not in catalog["events"]:
             st.info("No event data available for the selected filters and age.")
         else:
-            grouped_event = preprocess.group_by_year_and_age_group(data_event)
             mode_event = st.radio("Select mode (Event)", ("Absolute", "Relative"), key="mode_event")
-            grouped_event, size_col_event = preprocess.compute_relative_size_column(grouped_event, mode_event)
-            fig2 = scatter_charts.create_event_age_scatter(grouped_event, size_col_event)
-            st.plotly_chart(fig2, key="fig2")
+            with timing.phase("figure"):
+                fig2 = build_event_age_figure(discipline, event_selected, mode_event)
+            with timing.phase("plotly_chart"):
+                st.plotly_chart(fig2, key="fig2")
 
     else:
         st.info("Please select a discipline to view sub-category analysis.")
 
-    # ===========================
-    # Visualization 3
-    # Q3: Existe-t-il une tranche d'âge optimale pour remporter une médaille dans ma discipline ?
-    # ===========================
-    if discipline != "None":
-        st.subheader(f"Optimal age range for winning a medal in {discipline} :")
-    else:
-        st.subheader("Optimal age range for winning a medal in my discipline :")
-    
+# ===========================
+# Visualization 3
+# Q3: Existe-t-il une tranche d'âge optimale pour remporter une médaille dans ma discipline ?
+# ===========================
+def render_medal_age(discipline):
     # If a discipline is selected, filter the data and show the visualization
     if discipline != "None":
-        medal_by_age_distribution = preprocess.group_by_medal_and_age_group(olympics_data[olympics_data["Sport"] == discipline])
-        if medal_by_age_distribution.empty:
+        with timing.phase("figure"):
+            fig3 = build_medal_age_figure(discipline)
+        if fig3 is None:
             st.info("No medal data available for the selected sport.")
         else:
-            fig3 = bubble_chart.create_medal_age_bubble(medal_by_age_distribution)
-            st.plotly_chart(fig3, key="fig3")
+            with timing.phase("plotly_chart"):
+                st.plotly_chart(fig3, key="fig3")
     else:
         st.info("Please select a discipline to view medal analysis.")
 
-    # ===========================
-    # Visualization 4
-    # Q5, Q6 & Q7: Analyse de la performance et de la participation par pays via un diagramme Sankey
-    # ===========================
-    if user_country != "None" and discipline != "None":
-        st.subheader(f"Historical performance of {user_country_name} in {discipline} vs. key reference countries :")
-    else:
-        st.subheader("Historical performance of my country vs. key reference countries :")
-    
+# ===========================
+# Visualization 4
+# Q5, Q6 & Q7: Analyse de la performance et de la participation par pays via un diagramme Sankey
+# ===========================
+def render_sankey(discipline, user_country):
     # If a country and a discipline are selected, filter the data and show the visualization  
     if user_country != "None" and discipline != "None":
         # Allow the user to select the edition and the mode
-        participation_year = st.selectbox("Select a year", ["All Editions"] + sorted([year for year in olympics_data["Year"].unique() if year >= 1999], reverse=True))
+        participation_year = st.selectbox("Select a year", figures.sankey_years(catalog["years"]))
         performance_mode_event = st.radio("Select a mode", ("Absolute", "Relative"), key="performance_mode_event")
         if performance_mode_event == "Absolute":
             is_relative = False
@@ -164,101 +354,177 @@ def main():
         <span style="display:inline-block;width:20px;height:20px;border-radius:50%;background-color:#CD7F32;border:1px solid black;"></span> Bronze<br>
         <span style="display:inline-block;width:20px;height:20px;border-radius:50%;background-color:white;border:1px solid black;"></span> No Medal
          """, unsafe_allow_html=True)
-        fig4, is_country_data_available = sankey_diagrams.create_sankey_plot(olympics_data, participation_year, discipline, user_country, is_relative)
+        with timing.phase("figure"):
+            fig4, is_country_data_available = build_sankey_figure(discipline, user_country, participation_year, is_relative)
         if fig4 is None:
             st.info("No data available for the selected filters.")
         else:
             if not is_country_data_available:            
                 st.info("No data available for the selected country. However, here are the top 3 countries:")
-            st.plotly_chart(fig4, key="fig4")
+            with timing.phase("plotly_chart"):
+                st.plotly_chart(fig4, key="fig4")
     else:
         st.info("Please select a country and a discipline to view performance analysis.")
 
-    # ===========================
-    # Visualization 5
-    # Q8: Pour ma discipline, existe-t-il des disparités entre hommes et femmes ?
-    # ===========================
-    if discipline != "None":
-        st.subheader(f"Disparities between men and women in {discipline} :")
-    else :
-        st.subheader("Disparities between men and women in my discipline :")
-    
+# ===========================
+# Visualization 5
+# Q8: Pour ma discipline, existe-t-il des disparités entre hommes et femmes ?
+# ===========================
+def render_gender_dot_plot(discipline):
     # If a discipline is selected, filter the data and show the visualization
     if discipline != "None":
-            event_counts = preprocess.dot_plot_preprocess(olympics_data, discipline)
+            with timing.phase("figure"):
+                fig5 = build_gender_dot_plot_figure(discipline)
 
-            if "Men's" not in event_counts.columns or "Women's" not in event_counts.columns:
+            if fig5 is None:
                 st.error("There is no available data for selected discipline.")
             else:
-                fig5 = connected_dot_plot.connected_dot_plot(event_counts)
-                st.plotly_chart(fig5, use_container_width=True, key="fig5")
+                with timing.phase("plotly_chart"):
+                    st.plotly_chart(fig5, use_container_width=True, key="fig5")
     else:
         st.info("Please select a discipline to view gender disparities.")
 
-
-    # ===========================
-    # Visualization 6
-    # Q9 & Q10: Évolution de la répartition hommes-femmes et participation féminine dans le temps
-    # ===========================
-    if discipline != "None":
-        st.subheader(f"Evolution of gender participation in {discipline} :")
-    else :
-        st.subheader("Evolution of gender participation in my discipline :")
-
+# ===========================
+# Visualization 6
+# Q9 & Q10: Évolution de la répartition hommes-femmes et participation féminine dans le temps
+# ===========================
+def render_gender_by_year(discipline):
     # If a discipline is selected, filter the data and show the visualization
     if discipline != "None":
-        processed_data = preprocess.preprocess_gender_by_year(olympics_data, discipline)    
-        fig6 = stacked_bar_chart.visualize_data(processed_data)
-        st.plotly_chart(fig6, key="fig6")
+        with timing.phase("figure"):
+            fig6 = build_gender_by_year_figure(discipline)
+        with timing.phase("plotly_chart"):
+            st.plotly_chart(fig6, key="fig6")
 
     else:
         st.info("Please select a discipline to view gender disparities.")
 
-    # ===========================
-    # Visualization 7
-    # Q11: Combien de participations un athlète dans ma discipline a-t-il généralement avant de remporter une médaille ?
-    # ===========================
-    if discipline != "None":
-        st.subheader(f"Odds of winning a medal in {discipline} based on number of Olympic participations :")
-    else :
-        st.subheader("Odds of winning a medal in my discipline based on number of Olympic participations :")
-    
+# ===========================
+# Visualization 7
+# Q11: Combien de participations un athlète dans ma discipline a-t-il généralement avant de remporter une médaille ?
+# ===========================
+def render_participation_medals(discipline):
     # If a discipline is selected, filter the data and show the visualization
     if discipline != "None":
-        data = preprocess.preprocess_bar_chart_data(olympics_data, discipline)    
-        fig7 = bar_chart.visualize_data(data)
-        st.plotly_chart(fig7, key="fig7")
+        with timing.phase("figure"):
+            fig7 = build_participation_medal_figure(discipline)
+        with timing.phase("plotly_chart"):
+            st.plotly_chart(fig7, key="fig7")
 
     else:
         st.info("Please select a discipline to view the odds of winning a medal.")
 
-    # ===========================
-    # Visualization 8
-    # Q12: Combien de fois pourrais-je participer aux Jeux Olympiques tout au long de ma carrière ?
-    # ===========================
-    st.subheader("Career participation span across sports :")
-    
+# ===========================
+# Visualization 8
+# Q12: Combien de fois pourrais-je participer aux Jeux Olympiques tout au long de ma carrière ?
+# ===========================
+def render_career_span(discipline):
     # If a discipline is selected, filter the data and show the visualization
     if discipline != "None":
-        age_stats, age_stats_long = preprocess.preprocess_connected_dot_plot_data(olympics_data, discipline)    
-        fig8 = connected_dot_plot.connected_dot_plot_8(age_stats, age_stats_long, discipline)
-        st.plotly_chart(fig8, key="fig8")
+        with timing.phase("figure"):
+            fig8 = build_career_span_figure(discipline)
+        with timing.phase("plotly_chart"):
+            st.plotly_chart(fig8, key="fig8")
     else:
         st.info("Please select a discipline to view participation span.")
-        
-    # ===========================
-    # Visualization 9
-    # Q12: Combien de fois pourrais-je participer aux Jeux Olympiques tout au long de ma carrière ?
-    # ===========================  
-    st.subheader("Olympic Hall of Fame :")
-    
+
+# ===========================
+# Visualization 9
+# Q12: Combien de fois pourrais-je participer aux Jeux Olympiques tout au long de ma carrière ?
+# ===========================  
+def render_hall_of_fame(discipline):
     # If a discipline is selected, filter the data and show the visualization
     if discipline != "None":
-        medal_counts = preprocess.preprocess_stacked_bar_chart(olympics_data, discipline)    
-        fig9 = stacked_bar_chart.stacked_bar_chart_9(medal_counts)
-        st.plotly_chart(fig9, key="fig9")
+        with timing.phase("figure"):
+            fig9 = build_hall_of_fame_figure(discipline)
+        with timing.phase("plotly_chart"):
+            st.plotly_chart(fig9, key="fig9")
     else:
         st.info("Please select a discipline to view the top athletes.")
 
+def timings_enabled():
+    '''
+        Returns whether the section timings are enabled for the current session.
+    '''
+    return TIMINGS or st.query_params.get("timings") == "1"
+
+def show_timings(record):
+    '''
+        Shows the timings of the rerun in a collapsible debug panel.
+
+        Args:
+            record: The timings emitted by timing.finish_rerun
+    '''
+    with st.expander("Debug: section timings (ms)"):
+        columns = ["total"] + timing.PHASES
+        timings_table = pd.DataFrame.from_dict(
+            {section: {column: phases.get(f"{column}_ms", 0.0) for column in columns}
+             for section, phases in record["sections"].items()},
+            orient="index", columns=columns)
+        st.write(f"Rerun: {record['total_ms']:.1f} ms")
+        st.dataframe(timings_table.round(1))
+        st.caption("Figure cache: {hits} hits, {misses} misses, {entries}/{max_entries} entries".format(
+            **record["figure_cache"]))
+
+def main():
+    timing.start_rerun(timings_enabled())
+    # ---------------------------
+    # Sidebar: User Inputs
+    # ---------------------------
+    st.sidebar.image(header_image_path, width=200)
+    st.sidebar.title("Please provide the following details : ")
+    discipline = st.sidebar.selectbox("Select a discipline", ["None"] + [sport.value for sport in sport.Sport])
+    country_options = ["None"] + catalog["regions"]
+    user_country_name = st.sidebar.selectbox("Select your country", country_options)
+    user_country = catalog["noc_by_region"].get(user_country_name, "None")
+    show_warm_up(start_warm_up(data_holder))
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("[![GitHub](https://img.icons8.com/ios-glyphs/30/ffffff/github.png)](https://github.com/Mahacine/INF8808_Projet_Eq7) Developed by Team 7 : ")
+    st.sidebar.code("Rima Al Zawahra 2023119\nIman Bouara 1990495\nAlexis Desforges 2146454\nMahacine Ettahri 2312965\nNeda Khoshnoudi 2252125\nNicolas Lopez 2143179")
+
+    # Header
+    st.title("Welcome to our Olympics Data Exploration and Visualization App")
+    st.write(f"You have selected athletes from "
+             f"{user_country_name if user_country_name != 'None' else 'all countries'} in "
+             f"{discipline if discipline != 'None' else 'all disciplines'}.")
+
+    # Each section is shown in an expander, the first one is open by default
+    in_discipline = f"in {discipline}" if discipline != "None" else "in my discipline"
+    if user_country != "None" and discipline != "None":
+        performance_title = f"Historical performance of {user_country_name} in {discipline} vs. key reference countries :"
+    else:
+        performance_title = "Historical performance of my country vs. key reference countries :"
+
+    sections = [
+        ("age_distribution", f"Age group distribution and average age of athletes {in_discipline} :",
+            lambda: render_age_distribution(discipline)),
+        ("event_age", f"Age evolution of athletes across subcategories {in_discipline} :",
+            lambda: render_event_age(discipline)),
+        ("medal_age", f"Optimal age range for winning a medal {in_discipline} :",
+            lambda: render_medal_age(discipline)),
+        ("performance", performance_title,
+            lambda: render_sankey(discipline, user_country)),
+        ("gender_disparities", f"Disparities between men and women {in_discipline} :",
+            lambda: render_gender_dot_plot(discipline)),
+        ("gender_evolution", f"Evolution of gender participation {in_discipline} :",
+            lambda: render_gender_by_year(discipline)),
+        ("participation_medals", f"Odds of winning a medal {in_discipline} based on number of Olympic participations :",
+            lambda: render_participation_medals(discipline)),
+        ("career_span", "Career participation span across sports :",
+            lambda: render_career_span(discipline)),
+        ("hall_of_fame", "Olympic Hall of Fame :",
+            lambda: render_hall_of_fame(discipline)),
+    ]
+    for index, (key, title, render) in enumerate(sections):
+        expander = open_section(title, key, expanded=index == 0)
+        if expander is not None:
+            with expander, timing.section(key):
+                render()
+
+    record = timing.finish_rerun(discipline=discipline, country=user_country,
+                                 figure_cache=figure_cache.FIGURE_CACHE.stats())
+    if record is not None:
+        show_timings(record)
+
 if __name__ == "__main__":
     main()
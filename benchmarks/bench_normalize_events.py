@@ -0,0 +1,80 @@
+'''
+    Compares the row-wise and the vectorized event name normalization
+    at 1x and 10x the size of the athlete dataset.
+
+    Usage:
+        python benchmarks/bench_normalize_events.py [path/to/all_athlete_games.csv]
+'''
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import preprocess.preprocess as preprocess
+
+ATHLETES_PATH = './assets/data/all_athlete_games.csv'
+SCALES = [1, 10]
+REPEAT = 3
+
+
+def normalize_events_rowwise(df):
+    '''
+        Previous implementation of preprocess.normalize_events, kept as the reference.
+
+        args:
+            df: The dataframe
+        returns:
+            The dataframe with standardized 'Event' names
+    '''
+    df['Event'] = df.apply(
+        lambda row: re.sub(f'^{re.escape(row["Sport"])}\\s*', '',
+                        re.sub(r'\s*metres$', 'm',
+                        re.sub(r'^Athletics\s*', '', row['Event']))),
+        axis=1
+    )
+    return df
+
+
+def best_time(function, df):
+    '''
+        Runs the function on copies of the dataframe and keeps the best time.
+
+        args:
+            function: The normalization function
+            df: The input dataframe
+        returns:
+            The best wall time in seconds and the last result
+    '''
+    best = float('inf')
+    result = None
+    for _ in range(REPEAT):
+        data = df.copy()
+        start = time.perf_counter()
+        result = function(data)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else ATHLETES_PATH
+    base = pd.read_csv(path, usecols=['Sport', 'Event'])
+
+    print(f"{'scale':>5} {'rows':>10} {'row-wise (s)':>13} {'vectorized (s)':>15} {'speedup':>8}")
+    for scale in SCALES:
+        df = pd.concat([base] * scale, ignore_index=True)
+        rowwise_time, expected = best_time(normalize_events_rowwise, df)
+        vectorized_time, result = best_time(preprocess.normalize_events, df)
+
+        if expected['Event'].tolist() != result['Event'].tolist():
+            raise AssertionError('The vectorized normalization differs from the row-wise one')
+
+        print(f'{scale:>5} {len(df):>10} {rowwise_time:>13.3f} {vectorized_time:>15.3f} '
+              f'{rowwise_time / vectorized_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+'''
+    Checks that the backends of preprocess/backends.py return the same results as
+    the pandas backend on synthetic data, for the loading pipeline and for every
+    function and sport, and reports the time spent in each function by each backend.
+
+    Usage:
+        python benchmarks/check_backends.py [--scale 1] [--sports Judo,Swimming]
+                                            [--configurations sql-sqlite,sql-duckdb,polars,precomputed]
+
+    Exits with status 1 if a result differs.
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import preprocess.backends as backends
+import preprocess.dataset as dataset
+import preprocess.preprocess as preprocess
+import preprocess.sport as sport
+import synthetic
+
+REGIONS_PATH = os.path.join(ROOT, 'assets', 'data', 'all_regions.csv')
+# Country used for the Sankey diagram
+COUNTRY = 'CAN'
+
+# Backend configurations compared with the pandas backend: (backend, prepare arguments)
+CONFIGURATIONS = {
+    'sql-sqlite': ('sql', {'engine': 'sqlite'}),
+    'sql-duckdb': ('sql', {'engine': 'duckdb'}),
+    'polars': ('polars', {}),
+    'precomputed-1': ('precomputed', {'workers': 1, 'directory': None}),
+    'precomputed': ('precomputed', {'workers': None, 'directory': None}),
+}
+
+
+def backend_calls(discipline, years, event):
+    '''
+        Returns the backend calls to compare for a sport as (name, function) pairs,
+        each function taking the backend module and the prepared dataset.
+
+        args:
+            discipline: The selected sport
+            years: Two participation years to compare the Sankey diagrams of a single edition
+            event: An event of the sport to compare the counts of a single event
+    '''
+    calls = [
+        ('select_sport', lambda backend, data: backend.select_sport(data, discipline, ['Year', 'Age'])),
+        ('group_by_year_and_age_group', lambda backend, data: backend.group_by_year_and_age_group(data, discipline)),
+        ('group_by_medal_and_age_group', lambda backend, data: backend.group_by_medal_and_age_group(data, discipline)),
+        ('preprocess_sankey_data',
+            lambda backend, data: backend.preprocess_sankey_data(data, 'All Editions', discipline, COUNTRY)),
+        ('dot_plot_preprocess', lambda backend, data: backend.dot_plot_preprocess(data, discipline)),
+        ('preprocess_gender_by_year', lambda backend, data: backend.preprocess_gender_by_year(data, discipline)),
+        ('preprocess_bar_chart_data', lambda backend, data: backend.preprocess_bar_chart_data(data, discipline)),
+        ('compute_age_range_per_sport', lambda backend, data: backend.compute_age_range_per_sport(data)),
+        ('preprocess_stacked_bar_chart', lambda backend, data: backend.preprocess_stacked_bar_chart(data, discipline)),
+        (f'group_by_year_and_age_group {event}',
+            lambda backend, data: backend.group_by_year_and_age_group(data, discipline, event)),
+    ]
+    for year in years:
+        calls.append((f'preprocess_sankey_data {year}',
+                      lambda backend, data, year=year: backend.preprocess_sankey_data(data, year, discipline, COUNTRY)))
+    # The figures run the preprocessing on the dataset restricted to the sport
+    for name in ['group_by_year_and_age_group', 'preprocess_sankey_data', 'preprocess_bar_chart_data',
+                 'preprocess_stacked_bar_chart']:
+        arguments = ('All Editions', discipline, COUNTRY) if name == 'preprocess_sankey_data' else (discipline,)
+        calls.append((f'restrict_to_sport {name}', lambda backend, data, name=name, arguments=arguments:
+                      getattr(backend, name)(backend.restrict_to_sport(data, discipline), *arguments)))
+    return calls
+
+
+def compare(expected, actual):
+    '''
+        Compares two results, ignoring the column types and the default indexes.
+
+        args:
+            expected: The result of the pandas backend
+            actual: The result of the compared backend
+        returns:
+            None if the results are equal, the description of the difference otherwise
+    '''
+    if expected is None or actual is None:
+        return None if expected is None and actual is None else f'{type(expected)} != {type(actual)}'
+    # The named indexes (e.g. 'NOC' of the Sankey medal table) are compared, not the row positions
+    expected = expected.reset_index(drop=expected.index.name is None)
+    actual = actual.reset_index(drop=actual.index.name is None)
+    try:
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_categorical=False,
+                                      check_index_type=False, check_column_type=False)
+    except AssertionError as error:
+        return str(error).strip().splitlines()[0]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1, help='dataset scale')
+    parser.add_argument('--sports', default=None, help='comma separated sports, all of sport.Sport by default')
+    parser.add_argument('--configurations', default=','.join(CONFIGURATIONS),
+                        help='comma separated backend configurations, from ' + ', '.join(CONFIGURATIONS))
+    args = parser.parse_args()
+
+    sports = args.sports.split(',') if args.sports else [sport_.value for sport_ in sport.Sport]
+    regions = pd.read_csv(REGIONS_PATH)
+    raw = synthetic.generate_athletes(args.scale, regions_df=regions)
+    print(f'Scale {args.scale}x: {len(raw)} rows', flush=True)
+    names = args.configurations.split(',')
+    differences = []
+
+    # The loading pipeline, from the .csv file
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'athletes.csv')
+        raw.to_csv(path, index=False)
+        loaded = {}
+        for backend_name in dict.fromkeys(['pandas'] + [CONFIGURATIONS[name][0] for name in names]):
+            start = time.perf_counter()
+            loaded[backend_name] = backends.load_backend(backend_name).load_athletes(path, regions)
+            print(f'  {backend_name:<12} loaded in {time.perf_counter() - start:.3f}s', flush=True)
+            try:
+                pd.testing.assert_frame_equal(loaded['pandas'], loaded[backend_name])
+            except AssertionError as error:
+                differences.append(f'{backend_name} load_athletes: {str(error).strip().splitlines()[0]}')
+
+    base = dataset.build_dataset(loaded['pandas'], regions)
+    years = sorted(base['olympics_data']['Year'].unique())[-2:]
+
+    prepared = {'pandas': (backends.load_backend('pandas'), base)}
+    for name in names:
+        backend_name, options = CONFIGURATIONS[name]
+        backend = backends.load_backend(backend_name)
+        start = time.perf_counter()
+        prepared[name] = (backend, backend.prepare(base, **options))
+        print(f'  {name:<12} prepared in {time.perf_counter() - start:.3f}s', flush=True)
+
+    seconds = defaultdict(float)
+    for discipline in sports:
+        events = preprocess.select_sport(base['olympics_data'], discipline, base['sport_index'])['Event']
+        event = events.iloc[0] if len(events) else 'All'
+        for call_name, call in backend_calls(discipline, years, event):
+            results = {}
+            for name, (backend, data) in prepared.items():
+                start = time.perf_counter()
+                results[name] = call(backend, data)
+                seconds[(call_name.split()[0], name)] += time.perf_counter() - start
+            for name in prepared:
+                difference = compare(results['pandas'], results[name])
+                if difference:
+                    differences.append(f'{name} {discipline} {call_name}: {difference}')
+
+    print(f"  {'function':<30}" + ''.join(f'{name:>14}' for name in prepared))
+    for function_name in dict.fromkeys(call_name.split()[0] for call_name, _ in backend_calls('', years, 'All')):
+        print(f'  {function_name:<30}' + ''.join(f'{seconds[(function_name, name)]:>13.3f}s' for name in prepared))
+
+    for difference in differences:
+        print('Difference: ' + difference)
+    print(f'{len(differences)} differences')
+    sys.exit(1 if differences else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+'''
+    Compares two result files of run_benchmarks.py, e.g. from two commits.
+
+    The times of each function are summed over the sports, for each scale.
+
+    Usage:
+        python benchmarks/compare.py BASELINE.json CANDIDATE.json [--threshold 1.2]
+'''
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+DEFAULT_THRESHOLD = 1.2
+
+
+def total_times(path):
+    '''
+        Sums the times of each function over the sports.
+
+        args:
+            path: The result file
+        returns:
+            A dictionary mapping (scale, function) to the total time in seconds
+    '''
+    with open(path) as file:
+        results = json.load(file)['results']
+    totals = defaultdict(float)
+    for result in results:
+        if 'seconds' in result:
+            totals[(result['scale'], result['function'])] += result['seconds']
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='ratio above which a function is reported as a regression')
+    args = parser.parse_args()
+
+    baseline = total_times(args.baseline)
+    candidate = total_times(args.candidate)
+
+    regressions = 0
+    print(f"{'scale':>6} {'function':<65} {'baseline (s)':>13} {'candidate (s)':>14} {'ratio':>7}")
+    for key in sorted(baseline.keys() & candidate.keys(), key=lambda key: (key[0], key[1])):
+        scale, function = key
+        ratio = candidate[key] / baseline[key] if baseline[key] else float('inf')
+        flag = ''
+        if ratio > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f'{scale:>6} {function:<65} {baseline[key]:>13.4f} {candidate[key]:>14.4f} {ratio:>7.2f}{flag}')
+
+    for key in sorted(baseline.keys() - candidate.keys()):
+        print(f'{key[0]:>6} {key[1]:<65} only in the baseline')
+    for key in sorted(candidate.keys() - baseline.keys()):
+        print(f'{key[0]:>6} {key[1]:<65} only in the candidate')
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
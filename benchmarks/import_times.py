@@ -0,0 +1,148 @@
+'''
+    Reports the time spent importing the modules of app.py at startup, per
+    module, and checks it against a budget. The modules of the figures must not
+    be imported at startup: they are imported by the sections on first use, their
+    cost is reported separately.
+
+    Each measure imports the modules in a new interpreter with python -X importtime,
+    the best of several runs is kept.
+
+    Usage:
+        python benchmarks/import_times.py [--budget-ms 1500] [--repeat 3]
+
+    Exits with status 1 if the startup imports exceed the budget or import a deferred module.
+'''
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import preprocess.backends as backends
+
+APP_PATH = os.path.join(ROOT, 'app.py')
+DEFAULT_BUDGET_MS = 1500
+DEFAULT_REPEAT = 3
+# Written to stderr before the startup imports (after the ones of the interpreter) and before the deferred ones
+STARTUP_MARKER = '-- startup --'
+DEFERRED_MARKER = '-- deferred --'
+
+# Modules imported by the sections on first use, see visualizations/figures.py
+DEFERRED_MODULES = [
+    'plotly.express',
+    'visualizations.scatter_charts',
+    'visualizations.sankey_diagrams',
+    'visualizations.bubble_chart',
+    'visualizations.connected_dot_plot',
+    'visualizations.stacked_bar_chart',
+    'visualizations.bar_chart',
+]
+
+
+def startup_modules(path=APP_PATH):
+    '''
+        Lists the modules imported by app.py at startup: its top level imports,
+        then the module of the configured backend.
+
+        args:
+            path: The path of app.py
+        returns:
+            The names of the modules, in the order of the imports
+    '''
+    with open(path) as file:
+        tree = ast.parse(file.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    modules.append(backends.BACKEND_MODULES[backends.backend_name()])
+    return list(dict.fromkeys(modules))
+
+
+def parse_importtime(output):
+    '''
+        Reads the output of python -X importtime.
+
+        args:
+            output: The standard error of the interpreter
+        returns:
+            The (module, depth, cumulative milliseconds) of each import, for the
+            startup imports and for the deferred ones
+    '''
+    phases = ([], [])
+    current = None
+    for line in output.splitlines():
+        if line in (STARTUP_MARKER, DEFERRED_MARKER):
+            current = phases[line == DEFERRED_MARKER]
+            continue
+        if current is None or not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        current.append((name.strip(), depth, int(cumulative) / 1000))
+    return phases
+
+
+def measure(modules, deferred, repeat):
+    '''
+        Imports the modules in new interpreters and keeps the best time of each top level import.
+
+        args:
+            modules: The startup modules
+            deferred: The modules imported after the startup ones
+            repeat: The number of runs
+        returns:
+            The best cumulative milliseconds of the top level imports of the startup
+            and of the deferred modules, and the names of every module imported at startup
+    '''
+    code = '; '.join(['import sys', f'sys.stderr.write({STARTUP_MARKER!r} + "\\n")']
+                     + [f'import {module}' for module in modules]
+                     + [f'sys.stderr.write({DEFERRED_MARKER!r} + "\\n")']
+                     + [f'import {module}' for module in deferred])
+    best = ({}, {})
+    imported = set()
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        for phase, times in zip(parse_importtime(result.stderr), best):
+            for name, depth, milliseconds in phase:
+                if depth == 0:
+                    times[name] = min(times.get(name, float('inf')), milliseconds)
+        imported |= {name for name, _, _ in parse_importtime(result.stderr)[0]}
+    return best[0], best[1], imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='maximum time of the startup imports, in milliseconds')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='number of runs')
+    args = parser.parse_args()
+
+    modules = startup_modules()
+    startup, deferred, imported = measure(modules, DEFERRED_MODULES, args.repeat)
+    total = sum(startup.values())
+
+    print(f"{'startup import':<45} {'ms':>9}")
+    for name, milliseconds in sorted(startup.items(), key=lambda item: -item[1]):
+        print(f'{name:<45} {milliseconds:>9.1f}')
+    print(f"{'total':<45} {total:>9.1f}  (budget {args.budget_ms:.0f})")
+    print(f"\n{'deferred import (first use)':<45} {'ms':>9}")
+    for name, milliseconds in sorted(deferred.items(), key=lambda item: -item[1]):
+        print(f'{name:<45} {milliseconds:>9.1f}')
+
+    problems = [f'{module} is imported at startup' for module in DEFERRED_MODULES if module in imported]
+    if total > args.budget_ms:
+        problems.append(f'the startup imports take {total:.1f} ms, above the budget of {args.budget_ms:.0f} ms')
+    for problem in problems:
+        print('Over budget: ' + problem)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
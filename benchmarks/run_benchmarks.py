@@ -0,0 +1,331 @@
+'''
+    Times every function of preprocess/preprocess.py and every figure builder of
+    visualizations/ on synthetic data, for each sport of sport.Sport, and writes
+    the results to a JSON file.
+
+    Usage:
+        python benchmarks/run_benchmarks.py [--scales 1,10,100] [--sports Judo,Swimming]
+                                            [--repeat 3] [--output PATH]
+
+    Compare two result files with benchmarks/compare.py.
+'''
+import argparse
+import datetime
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+
+import pandas as pd
+import plotly
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import preprocess.dataset as dataset
+import preprocess.loader as loader
+import preprocess.preprocess as preprocess
+import preprocess.snapshot as snapshot
+import preprocess.sport as sport
+import visualizations.bar_chart as bar_chart
+import visualizations.bubble_chart as bubble_chart
+import visualizations.connected_dot_plot as connected_dot_plot
+import visualizations.sankey_diagrams as sankey_diagrams
+import visualizations.scatter_charts as scatter_charts
+import visualizations.stacked_bar_chart as stacked_bar_chart
+import synthetic
+
+REGIONS_PATH = os.path.join(ROOT, 'assets', 'data', 'all_regions.csv')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_SCALES = '1,10,100'
+DEFAULT_REPEAT = 3
+# Country used for the Sankey diagram
+COUNTRY = 'CAN'
+
+# Modules whose public functions are expected to be benchmarked
+BENCHMARKED_MODULES = [preprocess, loader, dataset, bar_chart, bubble_chart, connected_dot_plot,
+                       sankey_diagrams, scatter_charts, stacked_bar_chart]
+# Functions that are only called by other benchmarked functions
+HELPER_FUNCTIONS = {
+    'preprocess.dataset.load_dataset',
+    'preprocess.dataset.snapshot_key',
+    'preprocess.dataset.write_dataset_snapshot',
+    'preprocess.dataset.edition_files',
+    'preprocess.dataset.read_edition',
+    'preprocess.dataset.validate_edition',
+    'preprocess.dataset.normalize_edition',
+    'preprocess.dataset.pending_editions',
+    'preprocess.dataset.merge_new_editions',
+    'preprocess.loader.default_engine',
+    'preprocess.preprocess.normalize_event_name',
+    'preprocess.preprocess.count_rows',
+    'preprocess.preprocess.fill_no_medal',
+    'preprocess.preprocess.memory_report',
+    'preprocess.preprocess.participation_numbers',
+    'visualizations.scatter_charts.add_age_distribution_trace',
+    'visualizations.scatter_charts.add_avg_age_trace',
+    'visualizations.scatter_charts.format_age_yaxes',
+    'visualizations.sankey_diagrams.create_sankey_figure',
+}
+
+
+def qualified_name(function):
+    '''
+        Returns the module qualified name of a function.
+    '''
+    return f'{function.__module__}.{function.__name__}'
+
+
+def measure(prepare, repeat):
+    '''
+        Times a benchmark and keeps the best of several runs.
+
+        args:
+            prepare: Returns the call to time, with fresh copies of its inputs
+            repeat: The number of runs
+        returns:
+            The best wall time in seconds
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        run = prepare()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load_benchmarks(raw, regions, snapshot_dir):
+    '''
+        Returns the benchmarks of the load pipeline as (function, prepare) pairs.
+
+        args:
+            raw: The raw synthetic athlete data
+            regions: The regions dataframe
+            snapshot_dir: A temporary directory for the snapshots and the .csv file
+    '''
+    csv_path = os.path.join(snapshot_dir, 'athletes.csv')
+    raw.to_csv(csv_path, index=False)
+    converted = preprocess.convert_age(raw.copy())
+    normalized = preprocess.normalize_events(converted.copy())
+    with_regions = preprocess.normalize_countries(normalized.copy(), regions)
+    compacted = preprocess.compact_dtypes(with_regions.copy())
+    data = preprocess.add_career_columns(preprocess.sort_by_sport(compacted))
+
+    # The last edition is merged again, replacing its rows
+    editions_dir = os.path.join(snapshot_dir, 'editions')
+    os.makedirs(editions_dir)
+    raw[raw['Year'] == raw['Year'].max()].to_csv(os.path.join(editions_dir, 'edition.csv'), index=False)
+    edition_file = dataset.edition_files(editions_dir)[0]
+    # The app merges the editions into the columns read by the loader
+    current = dataset.build_dataset(preprocess.preprocess_athletes(loader.read_athletes(csv_path), regions), regions)
+    snapshot.write_snapshot(data, 'benchmark', snapshot_dir)
+
+    return [
+        (loader.read_athletes, lambda: partial(loader.read_athletes, csv_path)),
+        (preprocess.convert_age, lambda: partial(preprocess.convert_age, raw.copy())),
+        (preprocess.normalize_events, lambda: partial(preprocess.normalize_events, converted.copy())),
+        (preprocess.normalize_countries, lambda: partial(preprocess.normalize_countries, normalized.copy(), regions)),
+        (preprocess.compact_dtypes, lambda: partial(preprocess.compact_dtypes, with_regions.copy())),
+        (preprocess.sort_by_sport, lambda: partial(preprocess.sort_by_sport, compacted)),
+        (preprocess.preprocess_athletes, lambda: partial(preprocess.preprocess_athletes, raw.copy(), regions)),
+        (preprocess.add_career_columns, lambda: partial(preprocess.add_career_columns, preprocess.sort_by_sport(compacted))),
+        (preprocess.build_sport_index, lambda: partial(preprocess.build_sport_index, data)),
+        (preprocess.build_career_table, lambda: partial(preprocess.build_career_table, data)),
+        (preprocess.build_aggregation_cube, lambda: partial(preprocess.build_aggregation_cube, data)),
+        (preprocess.compute_age_range_per_sport, lambda: partial(preprocess.compute_age_range_per_sport, data)),
+        (preprocess.build_catalog, lambda: partial(preprocess.build_catalog, data, regions)),
+        (dataset.build_dataset, lambda: partial(dataset.build_dataset, data, regions)),
+        (dataset.merge_edition, lambda: partial(dataset.merge_edition, current, edition_file)),
+        (snapshot.write_snapshot, lambda: partial(snapshot.write_snapshot, data, 'benchmark', snapshot_dir)),
+        (snapshot.load_snapshot, lambda: partial(snapshot.load_snapshot, 'benchmark', snapshot_dir)),
+    ], data
+
+
+def sport_benchmarks(data, regions, cube, sport_index, cube_index, careers, career_index, discipline):
+    '''
+        Returns the benchmarks of the functions run for a selected sport as
+        (function, prepare) pairs. The inputs of the figure builders are computed
+        here and are not timed.
+
+        args:
+            data: The preprocessed athlete data
+            regions: The regions dataframe
+            cube: The aggregation cube
+            sport_index: The partition index of the data
+            cube_index: The partition index of the cube
+            careers: The career table
+            career_index: The partition index of the career table
+            discipline: The selected sport
+    '''
+    rows = preprocess.select_sport(data, discipline, sport_index)
+    sport_cube = preprocess.select_sport(cube, discipline, cube_index)
+    country_name = regions.loc[regions['NOC'] == COUNTRY, 'Region'].iloc[0]
+
+    grouped = preprocess.group_by_year_and_age_group(sport_cube)
+    medal_by_age = preprocess.group_by_medal_and_age_group(sport_cube)
+    event_counts = preprocess.dot_plot_preprocess(cube, discipline, cube_index)
+    gender_by_year = preprocess.preprocess_gender_by_year(cube, discipline, cube_index)
+    bar_chart_data = preprocess.preprocess_bar_chart_data(data, discipline, sport_index)
+    age_ranges = preprocess.compute_age_range_per_sport(data)
+    age_stats, age_stats_long = preprocess.preprocess_connected_dot_plot_data(age_ranges, discipline)
+    medal_counts = preprocess.preprocess_stacked_bar_chart(careers, discipline, career_index)
+
+    return [
+        (preprocess.select_sport, lambda: partial(preprocess.select_sport, data, discipline, sport_index)),
+        (preprocess.get_noc_from_country, lambda: partial(preprocess.get_noc_from_country, country_name, regions)),
+        (preprocess.add_age_group, lambda: partial(preprocess.add_age_group, rows)),
+        (preprocess.group_by_year_and_age_group, lambda: partial(preprocess.group_by_year_and_age_group, sport_cube)),
+        (preprocess.compute_relative_size_column,
+            lambda: partial(preprocess.compute_relative_size_column, grouped.copy(), 'Relative')),
+        (preprocess.preprocess_sankey_data,
+            lambda: partial(preprocess.preprocess_sankey_data, cube, 'All Editions', discipline, COUNTRY,
+                            sport_index=cube_index)),
+        (preprocess.group_by_medal_and_age_group, lambda: partial(preprocess.group_by_medal_and_age_group, sport_cube)),
+        (preprocess.dot_plot_preprocess, lambda: partial(preprocess.dot_plot_preprocess, cube, discipline, cube_index)),
+        (preprocess.preprocess_gender_by_year,
+            lambda: partial(preprocess.preprocess_gender_by_year, cube, discipline, cube_index)),
+        (preprocess.preprocess_bar_chart_data,
+            lambda: partial(preprocess.preprocess_bar_chart_data, data, discipline, sport_index)),
+        (preprocess.preprocess_connected_dot_plot_data,
+            lambda: partial(preprocess.preprocess_connected_dot_plot_data, age_ranges, discipline)),
+        (preprocess.preprocess_stacked_bar_chart,
+            lambda: partial(preprocess.preprocess_stacked_bar_chart, careers, discipline, career_index)),
+        (scatter_charts.create_age_distribution_bubble,
+            lambda: partial(scatter_charts.create_age_distribution_bubble, rows, grouped, 'Count', True, 'Absolute')),
+        (scatter_charts.create_event_age_scatter,
+            lambda: partial(scatter_charts.create_event_age_scatter, grouped, 'Count')),
+        (bubble_chart.create_medal_age_bubble, lambda: partial(bubble_chart.create_medal_age_bubble, medal_by_age)),
+        (sankey_diagrams.create_sankey_plot,
+            lambda: partial(sankey_diagrams.create_sankey_plot, cube, 'All Editions', discipline, COUNTRY,
+                            False, cube_index)),
+        (connected_dot_plot.connected_dot_plot, lambda: partial(connected_dot_plot.connected_dot_plot, event_counts)),
+        (connected_dot_plot.connected_dot_plot_8,
+            lambda: partial(connected_dot_plot.connected_dot_plot_8, age_stats, age_stats_long, discipline)),
+        (stacked_bar_chart.visualize_data, lambda: partial(stacked_bar_chart.visualize_data, gender_by_year)),
+        (stacked_bar_chart.stacked_bar_chart_9, lambda: partial(stacked_bar_chart.stacked_bar_chart_9, medal_counts)),
+        (bar_chart.visualize_data, lambda: partial(bar_chart.visualize_data, bar_chart_data)),
+    ]
+
+
+def not_benchmarked(benchmarked):
+    '''
+        Lists the public functions of the benchmarked modules without a benchmark.
+
+        args:
+            benchmarked: The qualified names of the benchmarked functions
+        returns:
+            The sorted qualified names of the missing functions
+    '''
+    missing = set()
+    for module in BENCHMARKED_MODULES:
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if function.__module__ == module.__name__ and not name.startswith('_'):
+                missing.add(qualified_name(function))
+    return sorted(missing - set(benchmarked) - HELPER_FUNCTIONS)
+
+
+def git_commit():
+    '''
+        Returns the current git commit, or None outside of a repository.
+    '''
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, sports, repeat):
+    '''
+        Runs every benchmark at every scale.
+
+        args:
+            scales: The dataset scales
+            sports: The sports to benchmark
+            repeat: The number of runs per benchmark
+        returns:
+            The list of results and the qualified names of the benchmarked functions
+    '''
+    regions = pd.read_csv(REGIONS_PATH)
+    results = []
+    benchmarked = set()
+
+    def record(scale, rows, group, function, discipline, prepare):
+        name = qualified_name(function)
+        benchmarked.add(name)
+        result = {'scale': scale, 'rows': rows, 'group': group, 'function': name, 'sport': discipline}
+        try:
+            result['seconds'] = measure(prepare, repeat)
+        except Exception as error:
+            result['error'] = f'{type(error).__name__}: {error}'
+        results.append(result)
+        timing = f"{result['seconds']:.4f}s" if 'seconds' in result else result['error']
+        print(f"  {name:<65} {discipline or '':<25} {timing}", flush=True)
+
+    for scale in scales:
+        raw = synthetic.generate_athletes(scale, regions_df=regions)
+        rows = len(raw)
+        print(f'Scale {scale}x: {rows} rows', flush=True)
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            benchmarks, data = load_benchmarks(raw, regions, snapshot_dir)
+            for function, prepare in benchmarks:
+                record(scale, rows, 'load', function, None, prepare)
+        del raw
+
+        sport_index = preprocess.build_sport_index(data)
+        cube = preprocess.build_aggregation_cube(data)
+        cube_index = preprocess.build_sport_index(cube)
+        careers = preprocess.build_career_table(data)
+        career_index = preprocess.build_sport_index(careers)
+        for discipline in sports:
+            for function, prepare in sport_benchmarks(data, regions, cube, sport_index, cube_index,
+                                                      careers, career_index, discipline):
+                record(scale, rows, 'sport', function, discipline, prepare)
+
+    return results, benchmarked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help='comma separated dataset scales')
+    parser.add_argument('--sports', default=None, help='comma separated sports, all of sport.Sport by default')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='runs per benchmark, the best is kept')
+    parser.add_argument('--output', default=None, help='result file, benchmarks/results/<commit>.json by default')
+    args = parser.parse_args()
+
+    scales = [float(scale) if '.' in scale else int(scale) for scale in args.scales.split(',')]
+    sports = args.sports.split(',') if args.sports else [sport_.value for sport_ in sport.Sport]
+    commit = git_commit()
+
+    results, benchmarked = run(scales, sports, args.repeat)
+    missing = not_benchmarked(benchmarked)
+    if missing:
+        print('Functions without a benchmark: ' + ', '.join(missing))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump({
+            'commit': commit,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plotly': plotly.__version__,
+            'repeat': args.repeat,
+            'scales': scales,
+            'not_benchmarked': missing,
+            'results': results,
+        }, file, indent=1)
+    print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
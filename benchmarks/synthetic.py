@@ -0,0 +1,128 @@
+'''
+    Generates synthetic athlete data with the same schema as all_athlete_games.csv.
+
+    Scale 1 has about as many rows as the real dataset, larger scales add more athletes.
+
+    Usage:
+        python benchmarks/synthetic.py SCALE OUTPUT_CSV
+'''
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from preprocess.sport import Sport
+
+REGIONS_PATH = './assets/data/all_regions.csv'
+
+# Size of the real dataset
+ROWS_PER_SCALE = 286_000
+
+COLUMNS = ['Entry ID', 'Name', 'Gender', 'Age', 'Team', 'NOC', 'Year',
+           'Season', 'City', 'Sport', 'Event', 'Medal']
+YEARS = np.array([year for year in range(1896, 2025, 4) if year not in (1916, 1940, 1944)])
+EVENT_KINDS = ['100 metres', '200 metres', '400 metres', 'Individual', 'Team', 'Doubles',
+               'Relay', 'Lightweight', 'Heavyweight', 'Open', 'Sprint', 'Long Distance']
+GENDER_PREFIXES = {'Male': "Men's", 'Female': "Women's"}
+MEDALS = np.array(['Gold', 'Silver', 'Bronze'], dtype=object)
+MEDAL_RATE = 0.15
+MISSING_AGE_RATE = 0.03
+
+
+def _event_names(sport, gender):
+    '''
+        Returns the raw event names of a sport for a gender, some of them prefixed
+        with the sport name as in the real data.
+    '''
+    prefix = GENDER_PREFIXES[gender]
+    names = [f'{prefix} {kind}' for kind in EVENT_KINDS]
+    names += [f'{sport} {prefix} {kind}' for kind in EVENT_KINDS[:4]]
+    names.append(f'Mixed {EVENT_KINDS[-1]}')
+    return names
+
+
+def generate_athletes(scale=1, seed=0, regions_df=None):
+    '''
+        Generates the synthetic athlete rows. Each athlete belongs to one sport and
+        country and takes part in consecutive Games, in one or more events.
+
+        args:
+            scale: The size of the dataset relative to the real one
+            seed: The seed of the random generator
+            regions_df: Dataframe with the 'NOC' codes to draw from
+        returns:
+            A dataframe with the schema of all_athlete_games.csv
+    '''
+    rng = np.random.default_rng(seed)
+    if regions_df is None:
+        regions_df = pd.read_csv(REGIONS_PATH)
+
+    target_rows = int(ROWS_PER_SCALE * scale)
+    # On average an athlete has about 2.5 rows (Games x events)
+    n_athletes = max(1, int(target_rows / 2.5))
+
+    sports = np.array([sport.value for sport in Sport] + ['Art Competitions', 'Curling', 'Golf'])
+    # Sport and country sizes are skewed, as in the real data
+    sport_weights = rng.lognormal(0, 0.8, len(sports))
+    sport_weights /= sport_weights.sum()
+    nocs = regions_df['NOC'].dropna().unique()
+    noc_weights = rng.lognormal(0, 1.2, len(nocs))
+    noc_weights /= noc_weights.sum()
+
+    athlete_sport = rng.choice(len(sports), n_athletes, p=sport_weights)
+    genders = np.array(list(GENDER_PREFIXES))
+    athlete_gender = (rng.random(n_athletes) < 0.3).astype(int)
+    athlete_noc = rng.choice(nocs, n_athletes, p=noc_weights)
+    athlete_first_games = rng.integers(0, len(YEARS), n_athletes)
+    athlete_first_age = np.clip(rng.normal(23, 4.5, n_athletes).round(), 11, 70).astype(int)
+    athlete_games = np.minimum(rng.geometric(0.6, n_athletes), len(YEARS) - athlete_first_games)
+
+    # One row per (athlete, Games)
+    athlete = np.repeat(np.arange(n_athletes), athlete_games)
+    games_offset = np.arange(len(athlete)) - np.repeat(np.cumsum(athlete_games) - athlete_games, athlete_games)
+    # One or more events per Games
+    events_per_games = rng.geometric(0.65, len(athlete))
+    athlete = np.repeat(athlete, events_per_games)
+    games_offset = np.repeat(games_offset, events_per_games)
+
+    n_rows = len(athlete)
+    sport = athlete_sport[athlete]
+    gender = athlete_gender[athlete]
+    # Table of the event names indexed by (sport, gender, event)
+    event_names = np.array([[_event_names(name, gender_) for gender_ in genders] for name in sports], dtype=object)
+    event = event_names[sport, gender, rng.integers(0, event_names.shape[2], n_rows)]
+
+    age = (athlete_first_age[athlete] + 4 * games_offset).astype(float)
+    age[rng.random(n_rows) < MISSING_AGE_RATE] = np.nan
+    medal = np.where(rng.random(n_rows) < MEDAL_RATE, rng.choice(MEDALS, n_rows), None)
+    noc = athlete_noc[athlete]
+    year = YEARS[athlete_first_games[athlete] + games_offset]
+
+    return pd.DataFrame({
+        'Entry ID': np.arange(n_rows),
+        'Name': np.char.add('Athlete ', athlete.astype(str)),
+        'Gender': genders[gender],
+        'Age': age,
+        'Team': noc,
+        'NOC': noc,
+        'Year': year,
+        'Season': 'Summer',
+        'City': 'Host City',
+        'Sport': sports[sport],
+        'Event': event,
+        'Medal': medal,
+    }, columns=COLUMNS)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    generate_athletes(float(sys.argv[1])).to_csv(sys.argv[2], index=False)
+
+
+if __name__ == '__main__':
+    main()
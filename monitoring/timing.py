@@ -0,0 +1,136 @@
+'''
+    Measures the time spent in each section of a rerun of the app.
+
+    The timings are opt-in: when they are not enabled for the current rerun,
+    section() and phase() do nothing.
+'''
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Phases of a section, in the order they usually run
+PHASES = ['filter', 'preprocess', 'figure', 'plotly_chart']
+
+logger = logging.getLogger('olympics.timing')
+if not logger.handlers:
+    # One JSON line per rerun on stdout, for the log pipeline
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Each session runs its reruns in its own thread
+_state = threading.local()
+
+
+class RerunTimings:
+    '''
+        The timings of one rerun, per section and per phase.
+    '''
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sections = {}
+        self.current_section = None
+        # Stack of the running phases, [name, start, time spent in nested phases]
+        self.phases = []
+
+    def add(self, section, name, seconds):
+        '''
+            Adds time to a phase of a section.
+        '''
+        phases = self.sections.setdefault(section, {})
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+def _current():
+    return getattr(_state, 'timings', None)
+
+
+def start_rerun(enabled):
+    '''
+        Starts measuring a rerun of the current session.
+
+        Args:
+            enabled: Whether the timings are enabled for this rerun
+    '''
+    _state.timings = RerunTimings() if enabled else None
+
+
+@contextmanager
+def section(name):
+    '''
+        Attributes the time spent in the block to a section.
+
+        Args:
+            name: The name of the section
+    '''
+    timings = _current()
+    if timings is None:
+        yield
+        return
+    previous = timings.current_section
+    timings.current_section = name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, 'total', time.perf_counter() - start)
+        timings.current_section = previous
+
+
+@contextmanager
+def phase(name):
+    '''
+        Attributes the time spent in the block to a phase of the current section.
+        Nested phases are excluded from the time of the enclosing one.
+
+        Args:
+            name: The name of the phase, one of PHASES
+    '''
+    timings = _current()
+    if timings is None or timings.current_section is None:
+        yield
+        return
+    frame = [name, time.perf_counter(), 0.0]
+    timings.phases.append(frame)
+    try:
+        yield
+    finally:
+        timings.phases.pop()
+        elapsed = time.perf_counter() - frame[1]
+        timings.add(timings.current_section, name, elapsed - frame[2])
+        if timings.phases:
+            timings.phases[-1][2] += elapsed
+
+
+def finish_rerun(**context):
+    '''
+        Stops measuring the rerun and emits its timings as one JSON line.
+
+        Args:
+            context: Additional fields of the JSON line (e.g. the widget values)
+        Returns:
+            The emitted record, or None if the timings are not enabled
+    '''
+    timings = _current()
+    if timings is None:
+        return None
+    _state.timings = None
+
+    record = {
+        'event': 'rerun_timings',
+        'timestamp': time.time(),
+        'total_ms': round((time.perf_counter() - timings.start) * 1000, 3),
+        **context,
+        'sections': {
+            section_name: {f'{phase_name}_ms': round(seconds * 1000, 3) for phase_name, seconds in phases.items()}
+            for section_name, phases in timings.sections.items()
+        },
+    }
+    logger.info(json.dumps(record, default=str))
+    return record
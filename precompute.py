@@ -0,0 +1,37 @@
+'''
+    Computes the aggregates of the precomputed backend for every sport before the
+    app starts, in a pool of processes, and stores them next to the snapshot of
+    the data. The app (OLYMPICS_BACKEND=precomputed) then loads them instead of
+    computing them in the server process.
+
+    Run it as a build step, whenever the data or the edition files change: the
+    app computes the aggregates it does not find in its own process, sport by sport.
+
+    Usage:
+        python precompute.py [--workers 4]
+'''
+import argparse
+import time
+
+import preprocess.dataset as dataset
+import preprocess.precomputed_backend as precomputed_backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=precomputed_backend.default_workers(),
+                        help='number of worker processes, OLYMPICS_PRECOMPUTE_WORKERS or all the cores by default')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    current, _ = dataset.load_dataset(precomputed_backend.load_athletes)
+    aggregates = precomputed_backend.precompute(current, args.workers)
+    key = precomputed_backend.aggregates_key(current)
+    if not precomputed_backend.write_aggregates(aggregates, key):
+        raise SystemExit(f'The aggregates could not be written to {precomputed_backend.aggregates_path(key)}')
+    print(f'Aggregates of {len(aggregates)} sports written to {precomputed_backend.aggregates_path(key)} '
+          f'in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+'''
+    Selects the backend running the preprocessing of the figures.
+
+    A backend is a module providing the functions of pandas_backend. The backend
+    modules are imported on demand, so that their optional dependencies are only
+    needed when they are selected.
+'''
+import importlib
+import os
+
+import pandas as pd
+
+import preprocess.preprocess as preprocess
+
+BACKEND_MODULES = {
+    "pandas": "preprocess.pandas_backend",
+    "sql": "preprocess.sql_backend",
+    "polars": "preprocess.polars_backend",
+    "precomputed": "preprocess.precomputed_backend",
+}
+
+DEFAULT_BACKEND = "pandas"
+
+
+def backend_name():
+    '''
+        Returns the name of the configured backend.
+
+        returns:
+            The value of the OLYMPICS_BACKEND environment variable, DEFAULT_BACKEND if it is not set
+    '''
+    return os.environ.get("OLYMPICS_BACKEND", DEFAULT_BACKEND)
+
+
+def load_backend(name=None):
+    '''
+        Imports a backend module.
+
+        args:
+            name: The name of the backend, one of BACKEND_MODULES, the configured one if None
+        returns:
+            The backend module
+        raises:
+            ValueError: If the backend is unknown
+    '''
+    name = name or backend_name()
+    if name not in BACKEND_MODULES:
+        raise ValueError(f"Unknown backend '{name}', expected one of {', '.join(BACKEND_MODULES)}")
+    return importlib.import_module(BACKEND_MODULES[name])
+
+
+def restore_dtypes(result, olympics_data):
+    '''
+        Gives the columns of a result computed outside of pandas the categories of
+        the data, so that the preprocess functions group and sort it like the data.
+
+        args:
+            result: The result, with text columns
+            olympics_data: The preprocessed dataframe
+        returns:
+            The result with categorical columns, 'Age Group' ordered as AGE_LABELS
+    '''
+    for column in result.columns:
+        if column == "Age Group":
+            result[column] = pd.Categorical(result[column], categories=preprocess.AGE_LABELS, ordered=True)
+        elif column in olympics_data.columns and isinstance(olympics_data[column].dtype, pd.CategoricalDtype):
+            result[column] = result[column].astype(object).astype(olympics_data[column].dtype)
+    return result
@@ -0,0 +1,383 @@
+'''
+    Contains some functions to gather the preprocessed data with its derived tables,
+    and to merge the results of a new edition into them without rebuilding them.
+
+    The results of an edition are .csv files with the columns of the athlete file,
+    dropped in EDITIONS_DIR. A file replaces the rows of its edition (Year, Season)
+    if the edition is already in the data, so it can be refreshed during the Games.
+'''
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+import preprocess.loader as loader
+import preprocess.preprocess as preprocess
+import preprocess.snapshot as snapshot
+
+logger = logging.getLogger(__name__)
+
+ATHLETES_PATH = './assets/data/all_athlete_games.csv'
+REGIONS_PATH = './assets/data/all_regions.csv'
+EDITIONS_DIR = './assets/data/editions'
+
+# Columns that must be filled in every row of an edition
+REQUIRED_VALUES = ["Name", "Gender", "NOC", "Year", "Season", "Sport", "Event"]
+# The integer columns of an edition are read in a wide type, so that a value out of
+# the range of the athlete file types is reported instead of wrapping around
+EDITION_DTYPES = {**loader.ATHLETE_DTYPES, "Entry ID": "int64", "Year": "int64"}
+# Years of the editions, from the first modern Games
+YEAR_RANGE = (1896, 2100)
+
+
+def build_dataset(olympics_data, regions_data, editions=()):
+    '''
+        Gathers the preprocessed data with the tables derived from it.
+
+        args:
+            olympics_data: The preprocessed dataframe, sorted by sport
+            regions_data: Dataframe mapping 'NOC' codes to country names in a 'Region' column
+            editions: The signatures of the edition files merged in the data, see edition_files
+        returns:
+            A dictionary with the data, its partition index ('sport_index'), the aggregation
+            cube ('cube', 'cube_index'), the career table ('careers', 'career_index'),
+            the age ranges per sport ('age_ranges'), the values of the widgets ('catalog'),
+            'regions_data', 'editions' and the number of merges that changed the rows of
+            each sport ('sport_versions', empty here, see merge_edition)
+    '''
+    sport_index = preprocess.build_sport_index(olympics_data)
+    cube = preprocess.build_aggregation_cube(olympics_data)
+    careers = preprocess.build_career_table(olympics_data)
+    return {
+        "olympics_data": olympics_data,
+        "regions_data": regions_data,
+        "sport_index": sport_index,
+        "cube": cube,
+        "cube_index": preprocess.build_sport_index(cube),
+        "careers": careers,
+        "career_index": preprocess.build_sport_index(careers),
+        "age_ranges": preprocess.compute_age_range_per_sport(olympics_data),
+        "catalog": preprocess.build_catalog(olympics_data, regions_data, sport_index),
+        "editions": tuple(editions),
+        "sport_versions": {},
+    }
+
+
+def edition_files(directory=EDITIONS_DIR):
+    '''
+        Lists the edition files, with their modification time and size so that a
+        refreshed file is detected.
+
+        args:
+            directory: The directory containing the edition files
+        returns:
+            The (path, modification time, size) signature of each .csv file, sorted by name
+    '''
+    if not os.path.isdir(directory):
+        return []
+    signatures = []
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.endswith('.csv'):
+            stat = entry.stat()
+            signatures.append((entry.path, stat.st_mtime_ns, stat.st_size))
+    return signatures
+
+
+def read_edition(path):
+    '''
+        Reads the results of an edition with the types of the athlete file, the
+        integer columns in a wide type (see EDITION_DTYPES).
+
+        args:
+            path: The path of the edition .csv file
+        returns:
+            The raw rows of the edition
+        raises:
+            ValueError: If a column is missing or has values of the wrong type
+    '''
+    edition = pd.read_csv(path, usecols=lambda column: column in loader.ATHLETE_COLUMNS,
+                          dtype=EDITION_DTYPES, engine="c")
+    missing = [column for column in loader.ATHLETE_COLUMNS if column not in edition.columns]
+    if missing:
+        raise ValueError(f"Invalid edition {path}: missing columns {', '.join(missing)}")
+    return edition[loader.ATHLETE_COLUMNS]
+
+
+def validate_edition(edition, olympics_data):
+    '''
+        Checks that the rows of an edition are consistent with the existing data.
+
+        args:
+            edition: The raw rows of the edition
+            olympics_data: The preprocessed dataframe
+        raises:
+            ValueError: Listing the problems found
+    '''
+    problems = []
+    if edition.empty:
+        problems.append("no rows")
+    editions = edition[["Year", "Season"]].drop_duplicates()
+    if len(editions) > 1:
+        problems.append(f"{len(editions)} editions (Year, Season) instead of one")
+    for column in REQUIRED_VALUES:
+        missing = int(edition[column].isna().sum())
+        if missing:
+            problems.append(f"{missing} rows without '{column}'")
+
+    unknown_medals = set(edition["Medal"].dropna().astype(str)) - set(preprocess.MEDAL_ORDER[:-1])
+    if unknown_medals:
+        problems.append(f"unknown medals {sorted(unknown_medals)}")
+    unknown_genders = set(edition["Gender"].dropna().astype(str)) - set(olympics_data["Gender"].astype(str))
+    if unknown_genders:
+        problems.append(f"unknown genders {sorted(unknown_genders)}")
+    ages = edition["Age"].dropna()
+    invalid_ages = int(((ages < preprocess.AGE_BINS[0]) | (ages >= preprocess.AGE_BINS[-1])).sum())
+    if invalid_ages:
+        problems.append(f"{invalid_ages} rows with an age outside [{preprocess.AGE_BINS[0]}, {preprocess.AGE_BINS[-1]})")
+    years = edition["Year"].dropna()
+    invalid_years = int(((years < YEAR_RANGE[0]) | (years >= YEAR_RANGE[1])).sum())
+    if invalid_years:
+        problems.append(f"{invalid_years} rows with a year outside [{YEAR_RANGE[0]}, {YEAR_RANGE[1]})")
+
+    if problems:
+        raise ValueError("Invalid edition: " + "; ".join(problems))
+
+
+def normalize_edition(edition, olympics_data, regions_data):
+    '''
+        Runs the preprocessing steps on the rows of an edition only, and converts
+        them to the types of the existing data. The new categories (athletes,
+        events...) are added after the existing ones, so the codes of the existing
+        rows, and thus the athlete IDs, do not change.
+
+        args:
+            edition: The raw rows of the edition
+            olympics_data: The preprocessed dataframe
+            regions_data: Dataframe mapping 'NOC' codes to country names in a 'Region' column
+        returns:
+            The preprocessed rows of the edition and the existing data, with the same column types
+        raises:
+            ValueError: If an integer value of the edition does not fit the type of its column
+    '''
+    edition = preprocess.convert_age(edition)
+    edition = preprocess.normalize_events(edition)
+    edition = preprocess.normalize_countries(edition, regions_data)
+
+    olympics_data = olympics_data.copy(deep=False)
+    for column in preprocess.CATEGORICAL_COLUMNS:
+        if column not in olympics_data.columns:
+            continue
+        existing = olympics_data[column].cat.categories
+        new_values = pd.Index(edition[column].dropna().unique()).astype(existing.dtype)
+        added = new_values.difference(existing, sort=False)
+        if len(added):
+            olympics_data[column] = olympics_data[column].cat.add_categories(added)
+        edition[column] = edition[column].astype(str).where(edition[column].notna()).astype(olympics_data[column].dtype)
+    for column in preprocess.INTEGER_COLUMNS:
+        dtype = olympics_data[column].dtype
+        values = edition[column].dropna()
+        if pd.api.types.is_integer_dtype(dtype) and len(values):
+            # Checked cast: a value that does not fit the type of the data would wrap around
+            limits = np.iinfo(getattr(dtype, "numpy_dtype", dtype))
+            if values.min() < limits.min or values.max() > limits.max:
+                raise ValueError(f"Invalid edition: '{column}' values outside [{limits.min}, {limits.max}]")
+        edition[column] = edition[column].astype(dtype)
+
+    edition["Athlete ID"] = edition["Name"].cat.codes.astype("int32")
+    edition["Participation_Number"] = 0
+    edition["Participation_Number"] = edition["Participation_Number"].astype(olympics_data["Participation_Number"].dtype)
+
+    return edition[olympics_data.columns], olympics_data
+
+
+def _align_categories(df, olympics_data):
+    '''
+        Gives the categorical columns of a derived table the categories of the data.
+    '''
+    df = df.copy(deep=False)
+    for column in df.columns:
+        if column in olympics_data.columns and isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.set_categories(olympics_data[column].cat.categories)
+    return df
+
+
+def _update_cube(cube, removed, added, olympics_data):
+    '''
+        Subtracts the counts of the removed rows from the aggregation cube and adds
+        the counts of the added rows.
+    '''
+    removed_cube = preprocess.build_aggregation_cube(removed)
+    removed_cube["Count"] = -removed_cube["Count"]
+    combined = pd.concat([_align_categories(cube, olympics_data), removed_cube,
+                          preprocess.build_aggregation_cube(added)], ignore_index=True)
+    counts = combined.groupby(preprocess.CUBE_DIMENSIONS, observed=True, dropna=False, sort=False)["Count"].sum()
+    return preprocess.sort_by_sport(counts[counts != 0].reset_index())
+
+
+def merge_edition(dataset, edition_file):
+    '''
+        Merges the results of an edition into a dataset. Only the rows of the
+        edition are preprocessed, the derived tables are updated for the athletes
+        and sports of the edition.
+
+        args:
+            dataset: The dataset, from build_dataset
+            edition_file: The signature of the edition file, from edition_files
+        returns:
+            A new dataset including the edition, the given one is not modified. The versions
+            of the sports of the removed and added rows are incremented, so that the state
+            derived from the dataset by a backend can be updated for these sports only
+        raises:
+            ValueError: If the edition is invalid
+    '''
+    path = edition_file[0]
+    olympics_data = dataset["olympics_data"]
+    edition = read_edition(path)
+    validate_edition(edition, olympics_data)
+    edition, olympics_data = normalize_edition(edition, olympics_data, dataset["regions_data"])
+
+    # The rows of the edition already in the data are replaced
+    year, season = edition["Year"].iloc[0], edition["Season"].iloc[0]
+    replaced = (olympics_data["Year"] == year) & (olympics_data["Season"] == season)
+    removed = olympics_data[replaced]
+    merged = preprocess.sort_by_sport(pd.concat([olympics_data[~replaced], edition], ignore_index=True))
+
+    # Renumber the participations of the athletes of the edition
+    athlete_ids = pd.concat([removed["Athlete ID"], edition["Athlete ID"]]).unique()
+    athlete_rows = merged["Athlete ID"].isin(athlete_ids)
+    numbers = merged["Participation_Number"].to_numpy(dtype="int64", copy=True)
+    numbers[athlete_rows.to_numpy()] = preprocess.participation_numbers(merged[athlete_rows]).sort_index().to_numpy()
+    merged["Participation_Number"] = pd.to_numeric(numbers, downcast="integer")
+
+    # Rebuild the careers of the athletes of the edition only
+    careers = _align_categories(dataset["careers"], merged)
+    careers = pd.concat([careers[~careers["Athlete ID"].isin(athlete_ids)],
+                         preprocess.build_career_table(merged[athlete_rows])], ignore_index=True)
+    careers = careers.sort_values(["Sport", "Athlete ID"], kind="stable", ignore_index=True)
+
+    # Recompute the age ranges of the sports of the edition only
+    sport_index = preprocess.build_sport_index(merged)
+    sports = set(removed["Sport"].dropna().astype(str)) | set(edition["Sport"].dropna().astype(str))
+    age_ranges = dataset["age_ranges"]
+    updated_ranges = preprocess.compute_age_range_per_sport(
+        pd.concat([preprocess.select_sport(merged, sport, sport_index) for sport in sports]))
+    age_ranges = pd.concat([age_ranges[~age_ranges["Sport"].isin(sports)], updated_ranges], ignore_index=True)
+    age_ranges = age_ranges.sort_values("Sport", kind="stable", ignore_index=True)
+
+    cube = _update_cube(dataset["cube"], removed, edition, merged)
+    editions = tuple(merged_file for merged_file in dataset["editions"] if merged_file[0] != path) + (edition_file,)
+    sport_versions = {**dataset["sport_versions"],
+                      **{sport: dataset["sport_versions"].get(sport, 0) + 1 for sport in sports}}
+
+    return {
+        **dataset,
+        "olympics_data": merged,
+        "sport_index": sport_index,
+        "cube": cube,
+        "cube_index": preprocess.build_sport_index(cube),
+        "careers": careers,
+        "career_index": preprocess.build_sport_index(careers),
+        "age_ranges": age_ranges,
+        "catalog": preprocess.build_catalog(merged, dataset["regions_data"], sport_index),
+        "editions": editions,
+        "sport_versions": sport_versions,
+    }
+
+
+def pending_editions(dataset, edition_files, rejected=()):
+    '''
+        Lists the edition files that are new or were refreshed since they were merged.
+
+        args:
+            dataset: The dataset, from build_dataset
+            edition_files: The signatures of the edition files, from edition_files
+            rejected: The signatures of the invalid edition files, which are skipped
+        returns:
+            The signatures of the edition files to merge
+    '''
+    return [edition_file for edition_file in edition_files
+            if edition_file not in dataset["editions"] and edition_file not in rejected]
+
+
+def merge_new_editions(dataset, edition_files, rejected):
+    '''
+        Merges the new or refreshed edition files into a dataset. The invalid files
+        are logged and added to the rejected files.
+
+        args:
+            dataset: The dataset, from build_dataset
+            edition_files: The signatures of the edition files, from edition_files
+            rejected: The set of the signatures of the invalid edition files
+        returns:
+            The dataset including the editions, the given one if there was nothing to merge
+    '''
+    for edition_file in pending_editions(dataset, edition_files, rejected):
+        try:
+            dataset = merge_edition(dataset, edition_file)
+        except ValueError as error:
+            logger.warning("Edition %s not merged: %s", edition_file[0], error)
+            rejected.add(edition_file)
+        else:
+            logger.info("Edition %s merged", edition_file[0])
+    return dataset
+
+
+def snapshot_key(editions, sources=()):
+    '''
+        Computes the key of the snapshot of the data built from the given edition files.
+
+        args:
+            editions: The signatures of all the edition files, merged or rejected
+            sources: Other source files the snapshot depends on
+        returns:
+            The fingerprint of the .csv files, of the edition files and of the preprocessing code
+    '''
+    edition_paths = [edition_file[0] for edition_file in editions]
+    return snapshot.fingerprint([ATHLETES_PATH, REGIONS_PATH] + edition_paths + snapshot.PREPROCESS_SOURCES + list(sources))
+
+
+def write_dataset_snapshot(dataset, edition_files, rejected):
+    '''
+        Stores the data of a dataset in a snapshot keyed by all the edition files,
+        with the paths of the rejected ones, so that a later load finds it and skips them.
+
+        args:
+            dataset: The dataset, from build_dataset
+            edition_files: The signatures of the edition files, from edition_files
+            rejected: The signatures of the invalid edition files
+        returns:
+            True if the snapshot was written, False otherwise
+    '''
+    rejected_paths = sorted(edition_file[0] for edition_file in edition_files if edition_file in rejected)
+    return snapshot.write_snapshot(dataset["olympics_data"], snapshot_key(edition_files),
+                                   metadata={"rejected": rejected_paths})
+
+
+def load_dataset(load_athletes):
+    '''
+        Loads the dataset including the current edition files. The preprocessed data
+        is stored in a snapshot keyed by the content of the .csv files and of the
+        preprocessing code, later loads read it instead.
+
+        args:
+            load_athletes: The function reading and preprocessing the athlete file,
+                the load_athletes of a backend
+        returns:
+            The dataset, from build_dataset, and the set of the rejected edition files
+    '''
+    regions_data = pd.read_csv(REGIONS_PATH)
+    editions = edition_files()
+    key = snapshot_key(editions)
+    olympics_data = snapshot.load_snapshot(key)
+    if olympics_data is not None:
+        rejected_paths = set(snapshot.load_snapshot_metadata(key).get("rejected", []))
+        rejected = {edition_file for edition_file in editions if edition_file[0] in rejected_paths}
+        merged = [edition_file for edition_file in editions if edition_file not in rejected]
+        return build_dataset(olympics_data, regions_data, merged), rejected
+
+    rejected = set()
+    olympics_data = load_athletes(ATHLETES_PATH, regions_data)
+    dataset = merge_new_editions(build_dataset(olympics_data, regions_data), editions, rejected)
+    write_dataset_snapshot(dataset, editions, rejected)
+    return dataset, rejected
@@ -0,0 +1,49 @@
+'''
+    Contains some functions to read the athlete .csv file with explicit types.
+'''
+import pandas as pd
+
+# Columns of the athlete file used by the app, 'Team' and 'City' are not read
+ATHLETE_COLUMNS = ["Entry ID", "Name", "Gender", "Age", "NOC", "Year", "Season", "Sport", "Event", "Medal"]
+
+# Types of the columns, the text columns are parsed directly as categoricals.
+# 'Age' has missing values and is converted to a nullable integer by convert_age
+ATHLETE_DTYPES = {
+    "Entry ID": "int32",
+    "Name": "category",
+    "Gender": "category",
+    "Age": "float32",
+    "NOC": "category",
+    "Year": "int16",
+    "Season": "category",
+    "Sport": "category",
+    "Event": "category",
+    "Medal": "category",
+}
+
+
+def default_engine():
+    '''
+        Returns the fastest available parser engine.
+
+        returns:
+            'pyarrow' if pyarrow is installed, 'c' otherwise
+    '''
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "c"
+    return "pyarrow"
+
+
+def read_athletes(path, engine=None):
+    '''
+        Reads the athlete file with explicit types and only the used columns.
+
+        args:
+            path: The path of the athlete .csv file
+            engine: The parser engine, the fastest available one if None
+        returns:
+            The raw athlete dataframe
+    '''
+    return pd.read_csv(path, usecols=ATHLETE_COLUMNS, dtype=ATHLETE_DTYPES, engine=engine or default_engine())
@@ -0,0 +1,196 @@
+'''
+    The default backend: runs the preprocessing of the figures with pandas on the
+    dataset tables (see dataset.build_dataset).
+
+    Every backend provides the functions of this module, with the same arguments
+    and results, so that the app can switch between them (see backends.py).
+'''
+import preprocess.loader as loader
+import preprocess.preprocess as preprocess
+
+
+def load_athletes(path, regions_df):
+    '''
+        Reads the athlete file and runs the whole preprocessing pipeline on it.
+
+        args:
+            path: The path of the athlete .csv file
+            regions_df: Dataframe mapping 'NOC' codes to country names in a 'Region' column
+        returns:
+            The preprocessed dataframe, see preprocess.preprocess_athletes
+    '''
+    return preprocess.preprocess_athletes(loader.read_athletes(path), regions_df)
+
+
+def prepare(dataset):
+    '''
+        Prepares the backend for a dataset. The pandas backend uses the dataset tables as is.
+
+        args:
+            dataset: The dataset, from dataset.build_dataset
+        returns:
+            The dataset, with the state of the backend
+    '''
+    return dataset
+
+
+def _restrict_table(df, sport_index, sport):
+    '''
+        Returns the rows of a sport with their partition index.
+    '''
+    rows = preprocess.select_sport(df, sport, sport_index)
+    return rows, {sport: slice(0, len(rows))}
+
+
+def restrict_to_sport(dataset, sport):
+    '''
+        Restricts a dataset to the rows of a sport. The other functions return the
+        same results for the sport on the restricted dataset, except
+        compute_age_range_per_sport which covers every sport.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The dataset with the athlete rows, the cube rows and the careers of the sport only
+    '''
+    olympics_data, sport_index = _restrict_table(dataset["olympics_data"], dataset["sport_index"], sport)
+    cube, cube_index = _restrict_table(dataset["cube"], dataset["cube_index"], sport)
+    careers, career_index = _restrict_table(dataset["careers"], dataset["career_index"], sport)
+    return {
+        **dataset,
+        "olympics_data": olympics_data,
+        "sport_index": sport_index,
+        "cube": cube,
+        "cube_index": cube_index,
+        "careers": careers,
+        "career_index": career_index,
+    }
+
+
+def select_sport(dataset, sport, columns=None):
+    '''
+        Returns the athlete rows of a sport.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            columns: The columns to return, all of them if None
+        returns:
+            The athlete rows of the sport, in the order of the data
+    '''
+    rows = preprocess.select_sport(dataset["olympics_data"], sport, dataset["sport_index"])
+    return rows if columns is None else rows[columns]
+
+
+def group_by_year_and_age_group(dataset, sport, event="All"):
+    '''
+        Counts the athletes of a sport per year and age group, see preprocess.group_by_year_and_age_group.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            event: The selected event of the sport, or "All"
+        returns:
+            The counts per year and age group with the age midpoints
+    '''
+    rows = preprocess.select_sport(dataset["cube"], sport, dataset["cube_index"])
+    if event != "All":
+        rows = rows[rows["Event"] == event]
+    return preprocess.group_by_year_and_age_group(rows)
+
+
+def group_by_medal_and_age_group(dataset, sport):
+    '''
+        Counts the medals of a sport per age group, see preprocess.group_by_medal_and_age_group.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The counts per medal and age group with the age midpoints
+    '''
+    return preprocess.group_by_medal_and_age_group(
+        preprocess.select_sport(dataset["cube"], sport, dataset["cube_index"]))
+
+
+def preprocess_sankey_data(dataset, year, sport, country, top_k=3):
+    '''
+        Computes the medal table of the Sankey diagram, see preprocess.preprocess_sankey_data.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            year: The participation year, or "All Editions"
+            sport: The selected sport
+            country: The NOC of the participating country
+            top_k: The number of countries with the most medals to compare with
+        returns:
+            The medal table, or None if there is no data
+    '''
+    return preprocess.preprocess_sankey_data(dataset["cube"], year, sport, country, top_k, dataset["cube_index"])
+
+
+def dot_plot_preprocess(dataset, sport):
+    '''
+        Counts the events of a sport per gender, see preprocess.dot_plot_preprocess.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The event counts per gender
+    '''
+    return preprocess.dot_plot_preprocess(dataset["cube"], sport, dataset["cube_index"])
+
+
+def preprocess_gender_by_year(dataset, sport):
+    '''
+        Computes the gender shares of a sport per year, see preprocess.preprocess_gender_by_year.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The male/female participation percentages per year
+    '''
+    return preprocess.preprocess_gender_by_year(dataset["cube"], sport, dataset["cube_index"])
+
+
+def preprocess_bar_chart_data(dataset, sport, max_participations=4):
+    '''
+        Computes the medal shares of a sport per participation, see preprocess.preprocess_bar_chart_data.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            max_participations: The largest participation number to keep
+        returns:
+            The medal counts and percentages per participation number
+    '''
+    return preprocess.preprocess_bar_chart_data(dataset["olympics_data"], sport, dataset["sport_index"],
+                                                max_participations)
+
+
+def compute_age_range_per_sport(dataset):
+    '''
+        Returns the minimum and maximum age of the athletes of each sport.
+
+        args:
+            dataset: The dataset, prepared by prepare
+        returns:
+            Dataframe with the min/max ages for each sport, see preprocess.compute_age_range_per_sport
+    '''
+    return dataset["age_ranges"]
+
+
+def preprocess_stacked_bar_chart(dataset, sport):
+    '''
+        Counts the medals of the athletes of a sport, see preprocess.preprocess_stacked_bar_chart.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The number of medals per athlete and medal type
+    '''
+    return preprocess.preprocess_stacked_bar_chart(dataset["careers"], sport, dataset["career_index"])
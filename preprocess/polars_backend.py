@@ -0,0 +1,296 @@
+'''
+    A backend running the loading pipeline and the aggregations of the figures
+    with Polars. The queries are built as lazy plans (the filters and the column
+    selections are pushed down to the scan) and run on all the cores.
+
+    Like the SQL backend, the aggregations only return the counts of the groups
+    of a sport, the reshaping of these counts (pivots, percentages...) is done by
+    the functions of preprocess.py, which accept counted rows like the aggregation cube.
+'''
+import pandas as pd
+import polars as pl
+
+import preprocess.backends as backends
+import preprocess.loader as loader
+import preprocess.preprocess as preprocess
+
+# Columns of the athlete rows kept in the Polars frame
+TABLE_COLUMNS = ["Sport", "Event", "Year", "Age", "Medal", "Gender", "NOC", "Region",
+                 "Name", "Athlete ID", "Participation_Number"]
+
+# Types of the numeric columns of the athlete file, the text columns are read as strings
+ATHLETE_SCHEMA = {"Entry ID": pl.Int32, "Age": pl.Float32, "Year": pl.Int16}
+
+
+def _age_group():
+    '''
+        Returns the expression of the age group of the 'Age' column, null outside of AGE_BINS.
+    '''
+    age_group = pl.lit(None, dtype=pl.String)
+    for low, high, label in zip(preprocess.AGE_BINS[:-1], preprocess.AGE_BINS[1:], preprocess.AGE_LABELS):
+        age_group = pl.when((pl.col("Age") >= low) & (pl.col("Age") < high)).then(pl.lit(label)).otherwise(age_group)
+    return age_group
+
+
+def scan_athletes(path):
+    '''
+        Returns the lazy plan reading the columns of the athlete file used by the app.
+
+        args:
+            path: The path of the athlete .csv file
+        returns:
+            The lazy frame of the raw athlete rows
+    '''
+    return pl.scan_csv(path, schema_overrides=ATHLETE_SCHEMA).select(loader.ATHLETE_COLUMNS)
+
+
+def convert_age(athletes):
+    '''
+        Converts the 'Age' column to integer type, see preprocess.convert_age.
+
+        args:
+            athletes: The lazy frame of the athlete rows
+        returns:
+            The lazy frame with 'Age' converted to integer
+    '''
+    return athletes.with_columns(pl.col("Age").cast(pl.Int64))
+
+
+def normalize_events(athletes):
+    '''
+        Standardizes the event names, see preprocess.normalize_event_name.
+
+        args:
+            athletes: The lazy frame of the athlete rows
+        returns:
+            The lazy frame with standardized 'Event' names
+    '''
+    event = (pl.col("Event").str.replace(preprocess.ATHLETICS_PREFIX_PATTERN.pattern, "")
+             .str.replace(preprocess.METRES_SUFFIX_PATTERN.pattern, "m"))
+    # The sport name is removed with the spaces following it, as _sport_prefix_pattern
+    event = (pl.when(event.str.starts_with(pl.col("Sport")))
+             .then(event.str.strip_prefix(pl.col("Sport")).str.strip_chars_start())
+             .otherwise(event))
+    return athletes.with_columns(Event=pl.when(pl.col("Sport").is_null()).then(pl.col("Event")).otherwise(event))
+
+
+def normalize_countries(athletes, regions_df):
+    '''
+        Adds the country name ('Region') using the NOC mapping, see preprocess.normalize_countries.
+
+        args:
+            athletes: The lazy frame of the athlete rows
+            regions_df: Dataframe mapping 'NOC' codes to country names in a 'Region' column
+        returns:
+            The lazy frame with a new 'Region' column
+    '''
+    regions = pl.from_pandas(regions_df[["NOC", "Region"]])
+    return athletes.with_columns(Region=pl.col("NOC").replace_strict(
+        regions["NOC"], regions["Region"], default=None, return_dtype=pl.String))
+
+
+def load_athletes(path, regions_df):
+    '''
+        Reads the athlete file and runs the whole preprocessing pipeline on it.
+        The pipeline runs as one lazy plan, the compact layout and the career
+        columns are then computed by pandas as in preprocess.preprocess_athletes.
+
+        args:
+            path: The path of the athlete .csv file
+            regions_df: Dataframe mapping 'NOC' codes to country names in a 'Region' column
+        returns:
+            The preprocessed dataframe, see preprocess.preprocess_athletes
+    '''
+    athletes = normalize_countries(normalize_events(convert_age(scan_athletes(path))), regions_df)
+    olympics_df = athletes.collect().to_pandas()
+
+    # The missing ages make the integers floats in pandas
+    olympics_df = preprocess.convert_age(olympics_df)
+    olympics_df = preprocess.compact_dtypes(olympics_df)
+    olympics_df = preprocess.sort_by_sport(olympics_df)
+    return preprocess.add_career_columns(olympics_df)
+
+
+def prepare(dataset):
+    '''
+        Converts the athlete rows of a dataset to a Polars frame, with their 'Age Group'.
+
+        args:
+            dataset: The dataset, from dataset.build_dataset
+        returns:
+            The dataset with its Polars frame ('polars')
+    '''
+    athletes = pl.from_pandas(dataset["olympics_data"][TABLE_COLUMNS])
+    return {**dataset, "polars": athletes.with_columns(_age_group().alias("Age Group"))}
+
+
+def _to_pandas(dataset, result):
+    '''
+        Converts a result to pandas with the column types of the data.
+    '''
+    return backends.restore_dtypes(result.to_pandas(), dataset["olympics_data"])
+
+
+def _count_rows(dataset, sport, by, condition=None):
+    '''
+        Counts the athlete rows of a sport per group. The groups are in the order
+        of their first row, like the groups of the aggregation cube.
+    '''
+    query = dataset["polars"].lazy().filter(pl.col("Sport") == sport)
+    if condition is not None:
+        query = query.filter(condition)
+    counts = query.group_by(["Sport"] + by, maintain_order=True).agg(Count=pl.len().cast(pl.Int64))
+    return _to_pandas(dataset, counts.collect())
+
+
+def restrict_to_sport(dataset, sport):
+    '''
+        Restricts a dataset to the rows of a sport, see pandas_backend.restrict_to_sport.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The dataset with the Polars rows of the sport only
+    '''
+    return {**dataset, "polars": dataset["polars"].filter(pl.col("Sport") == sport)}
+
+
+def select_sport(dataset, sport, columns=None):
+    '''
+        Returns the athlete rows of a sport.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            columns: The columns to return, TABLE_COLUMNS if None
+        returns:
+            The athlete rows of the sport, in the order of the data
+    '''
+    rows = dataset["polars"].lazy().filter(pl.col("Sport") == sport).select(columns or TABLE_COLUMNS)
+    return _to_pandas(dataset, rows.collect())
+
+
+def group_by_year_and_age_group(dataset, sport, event="All"):
+    '''
+        Counts the athletes of a sport per year and age group, see preprocess.group_by_year_and_age_group.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            event: The selected event of the sport, or "All"
+        returns:
+            The counts per year and age group with the age midpoints
+    '''
+    condition = None if event == "All" else pl.col("Event") == event
+    return preprocess.group_by_year_and_age_group(_count_rows(dataset, sport, ["Year", "Age Group"], condition))
+
+
+def group_by_medal_and_age_group(dataset, sport):
+    '''
+        Counts the medals of a sport per age group, see preprocess.group_by_medal_and_age_group.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The counts per medal and age group with the age midpoints
+    '''
+    counts = _count_rows(dataset, sport, ["Medal", "Age Group"], pl.col("Medal").is_not_null())
+    return preprocess.group_by_medal_and_age_group(counts)
+
+
+def preprocess_sankey_data(dataset, year, sport, country, top_k=3):
+    '''
+        Computes the medal table of the Sankey diagram, see preprocess.preprocess_sankey_data.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            year: The participation year, or "All Editions"
+            sport: The selected sport
+            country: The NOC of the participating country
+            top_k: The number of countries with the most medals to compare with
+        returns:
+            The medal table, or None if there is no data
+    '''
+    condition = None if year == "All Editions" else pl.col("Year") == int(year)
+    counts = _count_rows(dataset, sport, ["Year", "NOC", "Region", "Medal"], condition)
+    return preprocess.preprocess_sankey_data(counts, year, sport, country, top_k)
+
+
+def dot_plot_preprocess(dataset, sport):
+    '''
+        Counts the events of a sport per gender, see preprocess.dot_plot_preprocess.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The event counts per gender
+    '''
+    return preprocess.dot_plot_preprocess(_count_rows(dataset, sport, ["Event"]), sport)
+
+
+def preprocess_gender_by_year(dataset, sport):
+    '''
+        Computes the gender shares of a sport per year, see preprocess.preprocess_gender_by_year.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The male/female participation percentages per year
+    '''
+    return preprocess.preprocess_gender_by_year(_count_rows(dataset, sport, ["Year", "Gender"]), sport)
+
+
+def preprocess_bar_chart_data(dataset, sport, max_participations=4):
+    '''
+        Computes the medal shares of a sport per participation, see preprocess.preprocess_bar_chart_data.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            max_participations: The largest participation number to keep
+        returns:
+            The medal counts and percentages per participation number
+    '''
+    counts = _count_rows(dataset, sport, ["Participation_Number", "Medal"],
+                         pl.col("Participation_Number") <= max_participations)
+    return preprocess.preprocess_bar_chart_data(counts, sport, max_participations=max_participations)
+
+
+def compute_age_range_per_sport(dataset):
+    '''
+        Computes the minimum and maximum age of the athletes of each sport.
+
+        args:
+            dataset: The dataset, prepared by prepare
+        returns:
+            Dataframe with the min/max ages for each sport, see preprocess.compute_age_range_per_sport
+    '''
+    age_ranges = (dataset["polars"].lazy().filter(pl.col("Sport").is_not_null())
+                  .group_by("Sport").agg(Age_min=pl.col("Age").min(), Age_max=pl.col("Age").max()))
+    age_ranges = _to_pandas(dataset, age_ranges.collect()).sort_values("Sport", ignore_index=True)
+    age_ranges["Sport"] = age_ranges["Sport"].astype(str)
+    for column in ("Age_min", "Age_max"):
+        age_ranges[column] = pd.to_numeric(age_ranges[column].astype("Int64"), downcast="integer")
+    return age_ranges
+
+
+def preprocess_stacked_bar_chart(dataset, sport):
+    '''
+        Counts the medals of the athletes of a sport, see preprocess.preprocess_stacked_bar_chart.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The number of medals per athlete and medal type
+    '''
+    medals = {medal: (pl.col("Medal") == medal).sum().cast(pl.Int32) for medal in preprocess.MEDAL_ORDER[:-1]}
+    careers = (dataset["polars"].lazy().filter((pl.col("Sport") == sport) & pl.col("Medal").is_not_null())
+               .group_by(["Sport", "Athlete ID", "Name"]).agg(**medals))
+    careers = _to_pandas(dataset, careers.collect())
+    careers["Medals"] = careers[preprocess.MEDAL_ORDER[:-1]].sum(axis=1)
+    return preprocess.preprocess_stacked_bar_chart(careers, sport)
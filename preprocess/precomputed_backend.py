@@ -0,0 +1,404 @@
+'''
+    A backend computing the aggregates of the figures for every sport ahead of
+    time, so that the app only looks them up. The data is partitioned by sport
+    and the aggregates of each sport are merged into one lookup table per sport.
+
+    python precompute.py computes them in a pool of processes before the app
+    starts and stores them next to the snapshot of the data, where the app loads
+    them. The app never forks: without stored aggregates for its data, it computes
+    them in its own process and stores them for the next start.
+
+    The aggregates are computed for the default arguments of the figures: the
+    age groups of every event, the counts of the Sankey diagrams for every
+    edition and country, and the other figures of each sport. Any other call is
+    answered by the pandas backend.
+'''
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import preprocess.dataset as datasets
+import preprocess.pandas_backend as pandas_backend
+import preprocess.preprocess as preprocess
+import preprocess.snapshot as snapshot
+
+logger = logging.getLogger(__name__)
+
+# Columns of the partitions sent to the worker processes
+ATHLETE_COLUMNS = ["Sport", "Participation_Number", "Medal"]
+CAREER_COLUMNS = ["Sport", "Athlete ID", "Name", "Medals"] + preprocess.MEDAL_ORDER[:-1]
+# Dimensions of the counts of the Sankey diagram, filtered by edition and country on demand
+SANKEY_DIMENSIONS = ["Sport", "Year", "NOC", "Region", "Medal"]
+# Largest participation number of the medal odds figure
+MAX_PARTICIPATIONS = 4
+# Files of the stored aggregates, in the directory of the snapshots
+AGGREGATES_PREFIX = 'aggregates_'
+AGGREGATES_SUFFIX = '.pickle'
+
+
+def default_workers():
+    '''
+        Returns the number of worker processes of precompute.py.
+
+        returns:
+            The value of OLYMPICS_PRECOMPUTE_WORKERS if it is set, the number of cores otherwise
+    '''
+    return int(os.environ.get("OLYMPICS_PRECOMPUTE_WORKERS", os.cpu_count() or 1))
+
+
+def _partition(df, sport_index, sport, columns=None):
+    '''
+        Returns the rows of a sport with only the categories they use, which
+        keeps the partitions sent to the workers small.
+    '''
+    rows = preprocess.select_sport(df, sport, sport_index)
+    rows = (rows if columns is None else rows[columns]).copy()
+    for column in rows.columns:
+        if isinstance(rows[column].dtype, pd.CategoricalDtype) and column != "Age Group":
+            rows[column] = rows[column].cat.remove_unused_categories()
+    return rows
+
+
+def partition_dataset(dataset, sports=None):
+    '''
+        Splits the tables of a dataset by sport, largest sport first.
+
+        args:
+            dataset: The dataset, from dataset.build_dataset
+            sports: The sports to split, every sport of the data if None
+        returns:
+            A list of (sport, cube rows, athlete rows, career rows)
+    '''
+    sports = [sport for sport in dataset["cube_index"] if sports is None or sport in sports]
+    sports.sort(key=lambda sport: dataset["sport_index"][sport].stop - dataset["sport_index"][sport].start,
+                reverse=True)
+    return [(sport,
+             _partition(dataset["cube"], dataset["cube_index"], sport),
+             _partition(dataset["olympics_data"], dataset["sport_index"], sport, ATHLETE_COLUMNS),
+             _partition(dataset["careers"], dataset["career_index"], sport, CAREER_COLUMNS))
+            for sport in sports]
+
+
+def compute_sport_aggregates(sport, cube, athletes, careers):
+    '''
+        Computes the aggregates of the figures of a sport, in a worker process.
+
+        args:
+            sport: The sport
+            cube: The rows of the aggregation cube of the sport
+            athletes: The athlete rows of the sport, with ATHLETE_COLUMNS
+            careers: The rows of the career table of the sport
+        returns:
+            The sport and its aggregates, by name. An aggregate of a sport missing a
+            category (e.g. the gender shares of a sport without women) is left out, the
+            pandas backend computes it again on demand. Any other error is raised
+    '''
+    computations = {
+        "age_groups": lambda: {
+            event: preprocess.group_by_year_and_age_group(rows)
+            for event, rows in [("All", cube)] + list(cube.groupby("Event", observed=True, sort=False))
+        },
+        "medal_ages": lambda: preprocess.group_by_medal_and_age_group(cube),
+        # The groups are in the order of their first row, which breaks the ties of the top countries as the cube
+        "sankey_counts": lambda: cube.groupby(SANKEY_DIMENSIONS, observed=True, dropna=False, sort=False)["Count"]
+                                     .sum().reset_index(),
+        "gender_events": lambda: preprocess.dot_plot_preprocess(cube, sport),
+        "gender_by_year": lambda: preprocess.preprocess_gender_by_year(cube, sport),
+        "participation_medals": lambda: preprocess.preprocess_bar_chart_data(athletes, sport,
+                                                                             max_participations=MAX_PARTICIPATIONS),
+        "hall_of_fame": lambda: preprocess.preprocess_stacked_bar_chart(careers, sport),
+    }
+    aggregates = {}
+    for name, compute in computations.items():
+        try:
+            aggregates[name] = compute()
+        except KeyError as error:
+            # A column of the missing category, the error is raised again on demand
+            logger.info("Aggregate %s of %s not precomputed: missing %s", name, sport, error)
+    return sport, aggregates
+
+
+def precompute(dataset, workers=None, sports=None):
+    '''
+        Computes the aggregates of every sport, in parallel.
+
+        Several workers start new processes, which is only safe from a process
+        without other threads such as precompute.py: a process forked from a
+        multi-threaded one (e.g. the Streamlit server) can deadlock on a lock held
+        by another thread at that time.
+
+        args:
+            dataset: The dataset, from dataset.build_dataset
+            workers: The number of worker processes, default_workers() if None. With one
+                worker, the sports are computed in the current process
+            sports: The sports to compute, every sport of the data if None
+        returns:
+            A dictionary mapping each sport to its aggregates, see compute_sport_aggregates
+    '''
+    workers = workers or default_workers()
+    partitions = partition_dataset(dataset, sports)
+    if not partitions:
+        return {}
+    if workers <= 1:
+        return dict(compute_sport_aggregates(*partition) for partition in partitions)
+    with ProcessPoolExecutor(max_workers=min(workers, len(partitions))) as executor:
+        return dict(executor.map(compute_sport_aggregates, *zip(*partitions)))
+
+
+def aggregates_key(dataset):
+    '''
+        Computes the key of the stored aggregates of a dataset.
+
+        args:
+            dataset: The dataset, from dataset.load_dataset
+        returns:
+            The key of the snapshot of the data with the merged edition files, including the code of this module
+    '''
+    return datasets.snapshot_key(dataset["editions"], [os.path.abspath(__file__)])
+
+
+def aggregates_path(key, directory=snapshot.SNAPSHOT_DIR):
+    '''
+        Returns the path of the stored aggregates for a given key.
+
+        args:
+            key: The key of the aggregates, see aggregates_key
+            directory: The directory containing the snapshots
+        returns:
+            The path of the file of the aggregates
+    '''
+    return os.path.join(directory, f'{AGGREGATES_PREFIX}{key}{AGGREGATES_SUFFIX}')
+
+
+def load_aggregates(key, directory=snapshot.SNAPSHOT_DIR):
+    '''
+        Reads the aggregates stored for the key, if they exist.
+
+        args:
+            key: The key of the aggregates, see aggregates_key
+            directory: The directory containing the snapshots
+        returns:
+            The aggregates of every sport, or None if there are no usable aggregates
+    '''
+    path = aggregates_path(key, directory)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        # A corrupted file is simply computed again
+        return None
+
+
+def write_aggregates(aggregates, key, directory=snapshot.SNAPSHOT_DIR):
+    '''
+        Stores the aggregates of every sport. The aggregates with another key are removed.
+
+        args:
+            aggregates: The aggregates, from precompute
+            key: The key of the aggregates, see aggregates_key
+            directory: The directory containing the snapshots
+        returns:
+            True if the aggregates were written, False otherwise
+    '''
+    path = aggregates_path(key, directory)
+    # Write to a temporary file first, several processes may start at once
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(aggregates, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    snapshot.remove_stale_files(path, AGGREGATES_PREFIX, AGGREGATES_SUFFIX)
+    return True
+
+
+def update_aggregates(dataset, workers=None):
+    '''
+        Computes the aggregates of a dataset, reusing the ones it already has for
+        the sports whose rows did not change since they were computed.
+
+        args:
+            dataset: The dataset, from dataset.merge_edition when it was prepared before the merge
+            workers: The number of worker processes, default_workers() if None, see precompute
+        returns:
+            A dictionary mapping each sport to its aggregates, see compute_sport_aggregates
+    '''
+    previous = dataset.get("aggregates", {})
+    computed_versions = dataset.get("aggregate_versions", {})
+    versions = dataset["sport_versions"]
+    changed = {sport for sport in dataset["cube_index"]
+               if sport not in previous or versions.get(sport, 0) != computed_versions.get(sport, 0)}
+    updated = precompute(dataset, workers, changed)
+    return {sport: updated[sport] if sport in changed else previous[sport] for sport in dataset["cube_index"]}
+
+
+def prepare(dataset, workers=1, directory=snapshot.SNAPSHOT_DIR):
+    '''
+        Loads the aggregates stored for a dataset (see precompute.py), or computes and stores them.
+        After a merge (see dataset.merge_edition), only the sports of the merged
+        editions are computed again, the aggregates of the other sports are reused.
+
+        args:
+            dataset: The dataset, from dataset.load_dataset or dataset.merge_edition
+            workers: The number of worker processes, default_workers() if None. The app
+                computes them in its own process, see precompute
+            directory: The directory of the stored aggregates, None to always compute them
+        returns:
+            The dataset with the aggregates of every sport ('aggregates') and the versions
+            of the sports they were computed for ('aggregate_versions')
+    '''
+    key = None if directory is None else aggregates_key(dataset)
+    aggregates = None if key is None else load_aggregates(key, directory)
+    if aggregates is None:
+        aggregates = update_aggregates(dataset, workers)
+        if key is not None:
+            write_aggregates(aggregates, key, directory)
+    return {**dataset, "aggregates": aggregates, "aggregate_versions": dict(dataset["sport_versions"])}
+
+
+def _lookup(dataset, sport, name):
+    '''
+        Returns a copy of an aggregate of a sport, the figures modify their data.
+        None if the aggregate was not computed.
+    '''
+    aggregate = dataset["aggregates"].get(sport, {}).get(name)
+    return None if aggregate is None else aggregate.copy()
+
+
+load_athletes = pandas_backend.load_athletes
+select_sport = pandas_backend.select_sport
+compute_age_range_per_sport = pandas_backend.compute_age_range_per_sport
+
+
+def restrict_to_sport(dataset, sport):
+    '''
+        Restricts a dataset to a sport, see pandas_backend.restrict_to_sport. Only the
+        aggregates are looked up, the other calls fall back to the whole tables.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The dataset with the aggregates of the sport only
+    '''
+    return {**dataset, "aggregates": {sport: dataset["aggregates"].get(sport, {})}}
+
+
+def group_by_year_and_age_group(dataset, sport, event="All"):
+    '''
+        Counts the athletes of a sport per year and age group, see preprocess.group_by_year_and_age_group.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            event: The selected event of the sport, or "All"
+        returns:
+            The counts per year and age group with the age midpoints
+    '''
+    age_groups = dataset["aggregates"].get(sport, {}).get("age_groups", {})
+    if event not in age_groups:
+        return pandas_backend.group_by_year_and_age_group(dataset, sport, event)
+    return age_groups[event].copy()
+
+
+def group_by_medal_and_age_group(dataset, sport):
+    '''
+        Counts the medals of a sport per age group, see preprocess.group_by_medal_and_age_group.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The counts per medal and age group with the age midpoints
+    '''
+    medal_ages = _lookup(dataset, sport, "medal_ages")
+    return pandas_backend.group_by_medal_and_age_group(dataset, sport) if medal_ages is None else medal_ages
+
+
+def preprocess_sankey_data(dataset, year, sport, country, top_k=3):
+    '''
+        Computes the medal table of the Sankey diagram from the counts of the sport,
+        see preprocess.preprocess_sankey_data.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            year: The participation year, or "All Editions"
+            sport: The selected sport
+            country: The NOC of the participating country
+            top_k: The number of countries with the most medals to compare with
+        returns:
+            The medal table, or None if there is no data
+    '''
+    counts = dataset["aggregates"].get(sport, {}).get("sankey_counts")
+    if counts is None:
+        return pandas_backend.preprocess_sankey_data(dataset, year, sport, country, top_k)
+    return preprocess.preprocess_sankey_data(counts, year, sport, country, top_k)
+
+
+def dot_plot_preprocess(dataset, sport):
+    '''
+        Counts the events of a sport per gender, see preprocess.dot_plot_preprocess.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The event counts per gender
+    '''
+    event_counts = _lookup(dataset, sport, "gender_events")
+    return pandas_backend.dot_plot_preprocess(dataset, sport) if event_counts is None else event_counts
+
+
+def preprocess_gender_by_year(dataset, sport):
+    '''
+        Computes the gender shares of a sport per year, see preprocess.preprocess_gender_by_year.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The male/female participation percentages per year
+    '''
+    gender_shares = _lookup(dataset, sport, "gender_by_year")
+    return pandas_backend.preprocess_gender_by_year(dataset, sport) if gender_shares is None else gender_shares
+
+
+def preprocess_bar_chart_data(dataset, sport, max_participations=4):
+    '''
+        Computes the medal shares of a sport per participation, see preprocess.preprocess_bar_chart_data.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            max_participations: The largest participation number to keep
+        returns:
+            The medal counts and percentages per participation number
+    '''
+    medal_shares = _lookup(dataset, sport, "participation_medals") if max_participations == MAX_PARTICIPATIONS else None
+    if medal_shares is None:
+        return pandas_backend.preprocess_bar_chart_data(dataset, sport, max_participations)
+    return medal_shares
+
+
+def preprocess_stacked_bar_chart(dataset, sport):
+    '''
+        Counts the medals of the athletes of a sport, see preprocess.preprocess_stacked_bar_chart.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The number of medals per athlete and medal type
+    '''
+    medal_counts = _lookup(dataset, sport, "hall_of_fame")
+    return pandas_backend.preprocess_stacked_bar_chart(dataset, sport) if medal_counts is None else medal_counts
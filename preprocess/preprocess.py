@@ -1,8 +1,13 @@
 '''
     Contains some functions to preprocess the data used in the visualisation.
 '''
+import logging
+import numpy as np
 import pandas as pd
 import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
 
 # Global constants for age groups
 AGE_BINS = [10, 14, 17, 20, 23, 26, 30, 35, 100]
@@ -10,6 +15,21 @@ AGE_LABELS = ["10-14", "15-17", "18-20", "21-23", "24-26", "27-30", "31-35", "36
 AGE_MIDPOINTS = {"10-14": 12, "15-17": 16, "18-20": 19, "21-23": 22, 
                     "24-26": 25, "27-30": 28, "31-35": 33, "36+": 40}
 
+# Medal types, in the order they are displayed
+MEDAL_ORDER = ["Gold", "Silver", "Bronze", "No Medal"]
+
+# Text columns stored as categoricals (dictionary-encoded) in the compact layout
+CATEGORICAL_COLUMNS = ["Name", "Gender", "Team", "NOC", "Season", "City", "Sport", "Event", "Medal", "Region"]
+# Integer columns stored with the smallest integer type, missing values stay masked
+INTEGER_COLUMNS = ["Entry ID", "Year", "Age"]
+
+# Dimensions of the aggregation cube, every chart counting rows groups by a subset of them
+CUBE_DIMENSIONS = ["Sport", "Event", "Year", "Age Group", "Medal", "Gender", "NOC", "Region"]
+
+# Precompiled patterns used to standardize event names
+ATHLETICS_PREFIX_PATTERN = re.compile(r'^Athletics\s*')
+METRES_SUFFIX_PATTERN = re.compile(r'\s*metres$')
+
 def convert_age(df):
     '''
         Converts the 'Age' column to integer type
@@ -23,22 +43,59 @@ def convert_age(df):
     
     return df
 
+@lru_cache(maxsize=None)
+def _sport_prefix_pattern(sport):
+    '''
+        Returns the compiled pattern matching the sport name at the start of an event name
+
+        args:
+            sport: The sport name
+        returns:
+            The compiled pattern
+    '''
+    return re.compile(f'^{re.escape(sport)}\\s*')
+
+def normalize_event_name(sport, event):
+    '''
+        Standardizes a single event name by removing redundant or repetitive sport names
+        and converting terms
+
+        args:
+            sport: The sport of the event
+            event: The event name
+        returns:
+            The standardized event name
+    '''
+    if not isinstance(sport, str) or not isinstance(event, str):
+        return event
+    event = ATHLETICS_PREFIX_PATTERN.sub('', event)
+    event = METRES_SUFFIX_PATTERN.sub('m', event)
+    return _sport_prefix_pattern(sport).sub('', event)
+
 def normalize_events(df):
     '''
         Standardizes event names by removing redundant or repetitive sport names 
-        and converting terms
+        and converting terms.
+        Only the distinct (Sport, Event) pairs are normalized, the results are then
+        mapped back to the rows as a categorical column
         
         args:
             df: The dataframe
         returns:
             The dataframe with standardized 'Event' names
     '''
-    df['Event'] = df.apply(
-        lambda row: re.sub(f'^{re.escape(row["Sport"])}\\s*', '',
-                        re.sub(r'\s*metres$', 'm',
-                        re.sub(r'^Athletics\s*', '', row['Event']))),
-        axis=1
-    )
+    # Encode each row by its (Sport, Event) pair
+    sport_codes, sports = pd.factorize(df['Sport'], use_na_sentinel=False)
+    event_codes, events = pd.factorize(df['Event'], use_na_sentinel=False)
+    pair_codes, pairs = pd.factorize(sport_codes.astype('int64') * len(events) + event_codes)
+
+    # Normalize each distinct pair once
+    normalized = [normalize_event_name(sport, event) for sport, event in
+                  zip(sports[pairs // len(events)], events[pairs % len(events)])]
+
+    categories = pd.Index(sorted({event for event in normalized if isinstance(event, str)}))
+    category_codes = categories.get_indexer(normalized)
+    df['Event'] = pd.Categorical.from_codes(category_codes[pair_codes], categories=categories)
     
     return df
 
@@ -56,6 +113,263 @@ def normalize_countries(olympics_df, regions_df):
     return olympics_df
 
 
+def compact_dtypes(df):
+    '''
+        Converts the columns to a compact representation: categoricals for the text
+        columns and the smallest integer types for the numeric columns.
+
+        args:
+            df: The dataframe
+        returns:
+            The dataframe with compact column types
+    '''
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    for column in INTEGER_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+
+    return df
+
+
+def memory_report(usage_before, df):
+    '''
+        Reports the memory used by each column before and after the compact stage.
+
+        args:
+            usage_before: The bytes used per column before the compact stage,
+                as returned by df.memory_usage(index=False, deep=True)
+            df: The compacted dataframe
+        returns:
+            A dataframe with the bytes used 'Before', 'After' and 'Saved' per column
+    '''
+    report = pd.DataFrame({
+        "Before": usage_before,
+        "After": df.memory_usage(index=False, deep=True),
+    }).fillna(0).astype("int64")
+    report["Saved"] = report["Before"] - report["After"]
+    report.loc["Total"] = report.sum()
+
+    return report
+
+
+def fill_no_medal(medals):
+    '''
+        Replaces the missing medals by "No Medal".
+
+        args:
+            medals: The 'Medal' column, categorical or not
+        returns:
+            The column with "No Medal" instead of missing values
+    '''
+    if isinstance(medals.dtype, pd.CategoricalDtype) and "No Medal" not in medals.cat.categories:
+        medals = medals.cat.add_categories("No Medal")
+    return medals.fillna("No Medal")
+
+
+def sort_by_sport(df):
+    '''
+        Sorts the rows by sport so that each sport is stored contiguously.
+        The sort is stable, the order of the rows within a sport is kept
+
+        args:
+            df: The dataframe
+        returns:
+            The sorted dataframe with a new default index
+    '''
+    return df.sort_values('Sport', kind='stable').reset_index(drop=True)
+
+
+def build_sport_index(df):
+    '''
+        Builds the partition index of a dataframe sorted by sport.
+
+        args:
+            df: The dataframe, sorted with sort_by_sport
+        returns:
+            A dictionary mapping each sport to the slice of its rows
+    '''
+    sports = df['Sport'].to_numpy()
+    if len(sports) == 0:
+        return {}
+    boundaries = np.flatnonzero(sports[1:] != sports[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [len(sports)]))
+
+    return {sports[start]: slice(int(start), int(stop))
+            for start, stop in zip(starts, stops) if not pd.isna(sports[start])}
+
+
+def select_sport(df, sport, sport_index=None):
+    '''
+        Returns the rows of the given sport.
+
+        args:
+            df: The dataframe
+            sport: The selected sport
+            sport_index: The partition index of the dataframe, if None the whole
+                dataframe is scanned
+        returns:
+            The rows of the dataframe for the sport
+    '''
+    if sport_index is None:
+        return df[df["Sport"] == sport]
+    return df.iloc[sport_index.get(sport, slice(0, 0))]
+
+
+def preprocess_athletes(olympics_df, regions_df):
+    '''
+        Runs the whole preprocessing pipeline on the raw athlete data.
+
+        args:
+            olympics_df: The raw Olympics dataframe
+            regions_df: Dataframe mapping 'NOC' codes to country names in a 'Region' column
+        returns:
+            The preprocessed dataframe, sorted by sport
+    '''
+    olympics_df = convert_age(olympics_df)
+    olympics_df = normalize_events(olympics_df)
+    olympics_df = normalize_countries(olympics_df, regions_df)
+
+    usage_before = olympics_df.memory_usage(index=False, deep=True)
+    olympics_df = compact_dtypes(olympics_df)
+    logger.info("Memory used by the athlete table (bytes):\n%s", memory_report(usage_before, olympics_df))
+
+    olympics_df = sort_by_sport(olympics_df)
+    olympics_df = add_career_columns(olympics_df)
+
+    return olympics_df
+
+
+def add_career_columns(df):
+    '''
+        Adds the integer identifier of each athlete ('Athlete ID', the code of its name)
+        and the ordinal of each participation of an athlete in a sport
+        ('Participation_Number', by year and then by row order).
+
+        args:
+            df: The compacted dataframe
+        returns:
+            The dataframe with the 'Athlete ID' and 'Participation_Number' columns
+    '''
+    df["Athlete ID"] = df["Name"].cat.codes.astype("int32")
+    df["Participation_Number"] = pd.to_numeric(participation_numbers(df), downcast="integer")
+
+    return df
+
+
+def participation_numbers(df):
+    '''
+        Numbers the participations of each athlete in each sport, by year and then by row order.
+
+        args:
+            df: The rows of the athletes, with the 'Athlete ID' column
+        returns:
+            A series with the participation number of each row, aligned on the dataframe
+    '''
+    ordered = df[["Sport", "Athlete ID", "Year"]].sort_values(["Athlete ID", "Year"], kind="stable")
+    return ordered.groupby(["Sport", "Athlete ID"], observed=True, sort=False).cumcount() + 1
+
+
+def build_career_table(df):
+    '''
+        Summarizes the career of each athlete in each sport: first and last year,
+        number of Games and number of medals of each type.
+
+        args:
+            df: The preprocessed dataframe, with the 'Athlete ID' column
+        returns:
+            The career table with one row per athlete of each sport, sorted by sport
+            and athlete
+    '''
+    grouped = df.groupby(["Sport", "Athlete ID"], observed=True)
+    careers = grouped.agg(**{
+        "Name": ("Name", "first"),
+        "First Year": ("Year", "min"),
+        "Last Year": ("Year", "max"),
+        "Games": ("Year", "nunique"),
+    })
+
+    medals = df[df["Medal"].notna()]
+    medal_counts = medals.groupby(["Sport", "Athlete ID", "Medal"], observed=True).size().unstack("Medal", fill_value=0)
+    medal_counts.columns = medal_counts.columns.astype(str)
+    medal_counts = medal_counts.reindex(columns=MEDAL_ORDER[:-1], fill_value=0)
+    careers = careers.join(medal_counts)
+    careers[MEDAL_ORDER[:-1]] = careers[MEDAL_ORDER[:-1]].fillna(0).astype("int32")
+    careers["Medals"] = careers[MEDAL_ORDER[:-1]].sum(axis=1)
+
+    return careers.reset_index()
+
+
+def build_aggregation_cube(df):
+    '''
+        Counts the athlete rows for each combination of the cube dimensions.
+        The preprocess functions counting rows accept the cube instead of the
+        athlete rows and sum its 'Count' column.
+
+        args:
+            df: The preprocessed dataframe, sorted by sport
+        returns:
+            The aggregation cube with one row per observed combination and a 'Count' column
+    '''
+    df = df[[column for column in CUBE_DIMENSIONS if column != "Age Group"] + ["Age"]]
+    df = df.assign(**{"Age Group": pd.cut(df["Age"], bins=AGE_BINS, labels=AGE_LABELS, right=False)})
+
+    # Missing values (no medal, no age...) are kept as their own groups
+    cube = df.groupby(CUBE_DIMENSIONS, observed=True, dropna=False, sort=False).size().reset_index(name="Count")
+
+    return sort_by_sport(cube)
+
+
+def build_catalog(df, regions_df, sport_index=None):
+    '''
+        Lists the values proposed by the widgets of the app, so that they are not
+        recomputed from the athlete rows on every rerun.
+
+        args:
+            df: The preprocessed dataframe, sorted by sport
+            regions_df: Dataframe mapping 'NOC' codes to country names in a 'Region' column
+            sport_index: The partition index of the dataframe, built if None
+        returns:
+            A dictionary with the sorted countries of the data ('regions'), the sorted
+            years ('years'), the events of each sport in the order of the data ('events'),
+            and the mappings from country names to NOC codes ('noc_by_region', the first
+            NOC of a country as get_noc_from_country) and back ('region_by_noc')
+    '''
+    if sport_index is None:
+        sport_index = build_sport_index(df)
+    mappings = regions_df[["NOC", "Region"]].dropna()
+    noc_by_region = {}
+    for noc, region in zip(mappings["NOC"], mappings["Region"]):
+        noc_by_region.setdefault(region, noc)
+
+    return {
+        "regions": sorted(df["Region"].dropna().unique().tolist()),
+        "years": sorted(df["Year"].dropna().unique().tolist()),
+        "events": {sport: df["Event"].iloc[rows].unique().tolist() for sport, rows in sport_index.items()},
+        "noc_by_region": noc_by_region,
+        "region_by_noc": dict(zip(mappings["NOC"], mappings["Region"])),
+    }
+
+
+def count_rows(df, by, sort=True):
+    '''
+        Counts the athlete rows in each group, for athlete rows or aggregation cube rows.
+
+        args:
+            df: The athlete rows or the aggregation cube
+            by: The column(s) to group by
+            sort: Whether to sort the groups by key
+        returns:
+            A series with the number of athlete rows per group
+    '''
+    grouped = df.groupby(by, observed=True, sort=sort)
+    if "Count" in df.columns:
+        return grouped["Count"].sum()
+    return grouped.size()
+
+
 def get_noc_from_country(region_name, regions_df):
     '''
         Returns the NOC code corresponding to a given country name.
@@ -98,16 +412,14 @@ def group_by_year_and_age_group(df):
         Groups the dataframe by year and age group, and counts the number of athletes in each group.
 
         args:
-            df: The dataframe containing "Age" and "Year" columns
+            df: The dataframe containing "Age" and "Year" columns, or the aggregation cube
         returns:
             A grouped dataframe with counts and corresponding age midpoints
     '''
-    df = df.copy()
-    df = df.dropna(subset=["Age"])
-    df["Age Group"] = pd.cut(df["Age"], bins=AGE_BINS, labels=AGE_LABELS, right=False)
-    df["Age_Midpoint"] = df["Age Group"].map(AGE_MIDPOINTS)
+    if "Age Group" not in df.columns:
+        df = add_age_group(df)
 
-    grouped = df.groupby(["Year", "Age Group"]).size().reset_index(name="Count")
+    grouped = count_rows(df, ["Year", "Age Group"]).reset_index(name="Count")
     grouped["Age_Midpoint"] = grouped["Age Group"].map(AGE_MIDPOINTS)
 
     return grouped
@@ -134,29 +446,31 @@ def compute_relative_size_column(df, mode, value_col="Count", group_col="Year"):
     else:
         return df, value_col
 
-def preprocess_sankey_data(olympics_data, year, sport, country, top_k=3):
+def preprocess_sankey_data(olympics_data, year, sport, country, top_k=3, sport_index=None):
     '''
         Computes data to display in the participation sankey diagram
 
         args:
-            olympics_data: The dataframe 
+            olympics_data: The dataframe or the aggregation cube
             year: The participation year
             sport: The selected discipline
             country: The participating country
-            top_k: 
+            top_k: The number of countries with the most medals to compare with
+            sport_index: The partition index of the dataframe
         returns:
-            The constructed Sankey diagram
+            A dataframe with one row per country ('NOC' index), sorted by decreasing
+            participation, with its 'Region', the number of participations for each
+            of MEDAL_ORDER and their 'Total', or None if there is no data
     '''
     
     # If the selected year is "All Editions", include all years
-    if year == "All Editions":
-        df_medals = olympics_data[(olympics_data["Sport"] == sport)]
-    else:
-        df_medals = olympics_data[(olympics_data["Sport"] == sport) & (olympics_data["Year"] == year)]
+    df_medals = select_sport(olympics_data, sport, sport_index)
+    if year != "All Editions":
+        df_medals = df_medals[df_medals["Year"] == year]
 
     # Count the number of medals for each country
     df_medals_with_medals = df_medals[df_medals['Medal'].notna()]
-    total_medal_counts = df_medals_with_medals['NOC'].value_counts()
+    total_medal_counts = count_rows(df_medals_with_medals, 'NOC', sort=False).sort_values(ascending=False, kind='stable')
     # Select the 'country' and the top k countries
     top_countries = total_medal_counts.head(top_k).index.tolist()
     if country not in top_countries:
@@ -165,86 +479,77 @@ def preprocess_sankey_data(olympics_data, year, sport, country, top_k=3):
     # Keep only the previous countries
     df_medals = df_medals[df_medals['NOC'].isin(top_countries)]
 
-    # Create No Medal label for NaN values
-    df_medals['Medal'] = df_medals['Medal'].fillna('No Medal')
-
-    # Create a column to differiente each country and their medals
-    # This will be used to map each country to its own nodes in the sankey diagram
-    df_medals['Medal_NOC'] = df_medals['Medal'] + '_' + df_medals['NOC']
+    # Count the participations of each country for each type of medal, "No Medal" for NaN values
+    medal_counts = count_rows(df_medals.assign(Medal=fill_no_medal(df_medals['Medal'])), ['NOC', 'Region', 'Medal'])
+    if medal_counts.empty:
+        return None
 
-    # Count the number of medals for each country, for each type of medals
-    medal_counts = df_medals.groupby(['NOC', 'Region', 'Medal_NOC']).size().reset_index(name='Count')
-
-    total_counts_per_country = df_medals.groupby('NOC').size()  # Total participations per country
-    print(total_counts_per_country)
-    if total_counts_per_country.empty:
-        return None, None
-    
-    medal_counts['Percentage'] = medal_counts.apply(lambda row: (row['Count'] / total_counts_per_country[row['NOC']]) * 100, axis=1)  # Normalize to percentage
+    # One row per country and one column per type of medal
+    medal_table = medal_counts.unstack('Medal', fill_value=0)
+    medal_table.columns = medal_table.columns.astype(str)
+    medal_table = medal_table.reindex(columns=MEDAL_ORDER, fill_value=0).reset_index('Region')
+    medal_table.index = medal_table.index.astype(str)
+    medal_table['Total'] = medal_table[MEDAL_ORDER].sum(axis=1)
 
     # Sort countries
-    total_counts_sorted = medal_counts.groupby('NOC')['Count'].sum().sort_values(ascending=False)
-    sorted_countries = total_counts_sorted.index.tolist()
-
-    medal_counts['NOC'] = pd.Categorical(medal_counts['NOC'], categories=sorted_countries, ordered=True)
-    medal_counts = medal_counts.sort_values('NOC')
-
-    return df_medals, medal_counts
+    return medal_table.sort_values('Total', ascending=False, kind='stable')
 
 def group_by_medal_and_age_group(df):
     '''
         Groups the dataframe by year and age group, and counts the number of medals in each group.
 
         args:
-            df: The dataframe containing "Age" and "Medal" columns
+            df: The dataframe containing "Age" and "Medal" columns, or the aggregation cube
         returns:
             A grouped dataframe with medal counts
     '''
-    df = df.copy()
-    df = df.dropna(subset=["Age"])
-    df["Age Group"] = pd.cut(df["Age"], bins=AGE_BINS, labels=AGE_LABELS, right=False)
-    df["Age_Midpoint"] = df["Age Group"].map(AGE_MIDPOINTS)
-    grouped = df.groupby(["Medal", "Age Group"]).size().reset_index(name="Count")
+    if "Age Group" not in df.columns:
+        df = add_age_group(df)
+
+    grouped = count_rows(df, ["Medal", "Age Group"]).reset_index(name="Count")
     grouped["Age_Midpoint"] = grouped["Age Group"].map(AGE_MIDPOINTS)
     
     return grouped
 
 
-def dot_plot_preprocess(olympics_data, discipline):
+def dot_plot_preprocess(olympics_data, discipline, sport_index=None):
     '''
         Prepares event data for the dot plot showing gender disparities.
 
         args:
-            olympics_data: Olympics dataframe
+            olympics_data: Olympics dataframe or the aggregation cube
             discipline: The selected sport discipline
+            sport_index: The partition index of the dataframe
         returns:
             A dataframe counting events per gender
     '''
-    sport_events = olympics_data[olympics_data["Sport"] == discipline]["Event"]
-    df = pd.DataFrame(sport_events, columns=['Event'])
+    sport_events = select_sport(olympics_data, discipline, sport_index)
+    df = count_rows(sport_events, 'Event').reset_index(name='Count')
+    df['Event'] = df['Event'].astype(str)
 
     # Clean and categorize the data
     df['Clean_Event'] = df['Event'].str.replace(r"Men's |Women's |Mixed ", '', regex=True)
     df['Gender'] = df['Event'].str.extract(r"(Men's|Women's)")
 
     # Create a pivot table to count events by gender
-    event_counts = df.pivot_table(index='Clean_Event', columns='Gender', aggfunc='size', fill_value=0).reset_index()
+    event_counts = df.pivot_table(index='Clean_Event', columns='Gender', values='Count', aggfunc='sum', fill_value=0).reset_index()
     
     return event_counts
 
-def preprocess_gender_by_year(data, sport):
+def preprocess_gender_by_year(data, sport, sport_index=None):
     '''
         Process gender participation data over the years for a stacked bar chart.
 
         args:
-            data: Olympics dataframe
+            data: Olympics dataframe or the aggregation cube
             sport: The selected sport discipline
+            sport_index: The partition index of the dataframe
         returns:
             A pivoted dataframe with male/female participation percentages per year
     '''
-    athletics_data = data[data["Sport"] == sport]
+    athletics_data = select_sport(data, sport, sport_index)
     # Count number of entries by Year and Gender
-    gender_counts = athletics_data.groupby(["Year", "Gender"]).size().reset_index(name="Count")
+    gender_counts = count_rows(athletics_data, ["Year", "Gender"]).reset_index(name="Count")
 
     pivot_df = gender_counts.pivot(index="Year", columns="Gender", values="Count").fillna(0)
     # Calculate total participants per year
@@ -258,28 +563,29 @@ def preprocess_gender_by_year(data, sport):
     
     return pivot_df
 
-def preprocess_bar_chart_data(olympics_data, sport):
+def preprocess_bar_chart_data(olympics_data, sport, sport_index=None, max_participations=4):
     '''
-        Computes data to display in the 
+        Computes the medal counts and shares per number of participations of a sport,
+        displayed in the participation/medal bar chart (Visualization 7).
 
         args:
-            olympics_data: The dataframe 
+            olympics_data: The dataframe, or rows counted per 'Sport', 'Participation_Number'
+                and 'Medal' in a 'Count' column
             sport: The selected discipline
+            sport_index: The partition index of the dataframe
+            max_participations: The largest participation number to keep
         returns:
             Data for the Visualisation 7 bar chart
     '''
-    df = olympics_data[olympics_data["Sport"] == sport].sort_values(["Name", "Year"])
+    df = select_sport(olympics_data, sport, sport_index)
 
-    # Count number of participations per athlete
-    df["Participation_Number"] = df.groupby("Name").cumcount() + 1 
-    df["Medal_Status"] = df["Medal"].apply(lambda x: "Medal Won" if pd.notna(x) else "No Medal")
-    df["Medal"] = df["Medal"].fillna("No Medal")
+    # The number of participations per athlete is precomputed by add_career_columns
+    df = df[df["Participation_Number"] <= max_participations]
 
-    # Aggregate counts by number of participations and medal status
-    participation_counts = df.groupby(["Participation_Number", "Medal_Status"]).size().unstack(fill_value=0)
-    participation_counts = participation_counts.reset_index()
-    participation_counts_detailed = df.groupby(["Sport", "Participation_Number", "Medal"]).size().unstack(fill_value=0)
-    participation_counts_detailed = participation_counts_detailed[["Gold", "Silver", "Bronze", "No Medal"]].reset_index()
+    # Aggregate counts by number of participations and medal type
+    participation_counts_detailed = count_rows(df.assign(Medal=fill_no_medal(df["Medal"])),
+                                               ["Sport", "Participation_Number", "Medal"]).unstack(fill_value=0)
+    participation_counts_detailed = participation_counts_detailed.reindex(columns=MEDAL_ORDER, fill_value=0).reset_index()
     
     sport_selected_medals = participation_counts_detailed
 
@@ -288,16 +594,29 @@ def preprocess_bar_chart_data(olympics_data, sport):
     sport_selected_medals['Silver_Percentage'] = (sport_selected_medals['Silver'] / (sport_selected_medals['Gold'] + sport_selected_medals['Silver'] + sport_selected_medals['Bronze'] + sport_selected_medals['No Medal'])) * 100
     sport_selected_medals['Bronze_Percentage'] = (sport_selected_medals['Bronze'] / (sport_selected_medals['Gold'] + sport_selected_medals['Silver'] + sport_selected_medals['Bronze'] + sport_selected_medals['No Medal'])) * 100
     
-    df = sport_selected_medals[sport_selected_medals['Participation_Number'] <= 4] 
-    
-    return df
+    return sport_selected_medals
 
-def preprocess_connected_dot_plot_data(olympics_data, sport):
+def compute_age_range_per_sport(olympics_data):
     '''
-        Prepares min and max age data for each sport
+        Computes the minimum and maximum age of the athletes of each sport.
+        It does not depend on the selected sport, so it can be computed once.
 
         args:
             olympics_data: Olympics dataframe
+        returns:
+            Dataframe with the min/max ages for each sport
+    '''
+    age_stats = olympics_data.groupby('Sport', observed=True)['Age'].agg(Age_min='min', Age_max='max').reset_index()
+    age_stats['Sport'] = age_stats['Sport'].astype(str)
+    return age_stats
+
+
+def preprocess_connected_dot_plot_data(age_ranges, sport):
+    '''
+        Prepares min and max age data for each sport
+
+        args:
+            age_ranges: The min/max ages for each sport, from compute_age_range_per_sport
             sport: The selected sport to highlight in the visualization
 
         returns:
@@ -305,17 +624,11 @@ def preprocess_connected_dot_plot_data(olympics_data, sport):
             age_stats_long: Melted version for plotting
     '''
 
-    df = olympics_data
-    
-    df['Career Length'] = df.groupby('Name')['Year'].transform('nunique')
-    
-    # Get minimum and maximum age per sport
-    min_age = df.groupby('Sport')['Age'].min().reset_index()
-    max_age = df.groupby('Sport')['Age'].max().reset_index()
-    age_stats = pd.merge(min_age, max_age, on='Sport', suffixes=('_min', '_max'))
+    # The age ranges are shared between the sessions, only the copy gets the colors
+    age_stats = age_ranges.copy()
 
     # Highlight the selected sport in red, others in gray
-    age_stats['Color'] = age_stats['Sport'].apply(lambda x: 'red' if x == sport else 'gray')
+    age_stats['Color'] = np.where(age_stats['Sport'] == sport, 'red', 'gray')
 
     # Reshape the data for plotting
     age_stats_long = pd.melt(
@@ -328,22 +641,25 @@ def preprocess_connected_dot_plot_data(olympics_data, sport):
     return age_stats, age_stats_long   
 
 
-def preprocess_stacked_bar_chart(olympics_data, sport):
+def preprocess_stacked_bar_chart(careers, sport, career_index=None):
     '''
         Returns the count of medals per athlete for a given sport
 
         args:
-            olympics_data: Olympics dataframe
+            careers: The career table, from build_career_table
             sport: The selected sport to filter on
+            career_index: The partition index of the career table
 
         returns:
             medal_counts: Dataframe with number of medals per athlete by medal type
     '''
 
-    df = olympics_data[olympics_data["Sport"] == sport]
-    
-    df["Medal"] = df["Medal"].fillna("No Medal")
+    # The athletes of the sport who won a medal, ordered by name (the athlete IDs are the codes of the names)
+    athletes = select_sport(careers, sport, career_index)
+    athletes = athletes[athletes["Medals"] > 0]
 
-    medal_counts = df[df["Medal"] != "No Medal"].groupby(["Name", "Medal"]).size().reset_index(name="Count")
+    # One row per athlete and medal type won
+    medal_counts = athletes.melt(id_vars="Name", value_vars=sorted(MEDAL_ORDER[:-1]), var_name="Medal", value_name="Count")
+    medal_counts = medal_counts[medal_counts["Count"] > 0].sort_values(["Name", "Medal"], kind="stable", ignore_index=True)
     
-    return medal_counts
\ No newline at end of file
+    return medal_counts
@@ -0,0 +1,167 @@
+'''
+    Contains some functions to store the preprocessed data in a columnar
+    snapshot and to read it back on later starts.
+'''
+import hashlib
+import json
+import os
+
+SNAPSHOT_DIR = './assets/cache'
+SNAPSHOT_PREFIX = 'olympics_'
+SNAPSHOT_SUFFIX = '.feather'
+# Key of the metadata of the snapshot in the schema of the Arrow table
+METADATA_KEY = b'olympics'
+
+# The preprocessing code is part of the snapshot key, so that any change to it
+# invalidates the snapshots written by a previous version
+PREPROCESS_SOURCES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preprocess.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'loader.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pandas_backend.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'polars_backend.py'),
+]
+
+
+def fingerprint(paths, chunk_size=1 << 20):
+    '''
+        Computes a content hash of the given files.
+
+        args:
+            paths: The paths of the files to hash (data files and source files)
+            chunk_size: The number of bytes read at once
+        returns:
+            A hexadecimal digest identifying the content of all the files
+    '''
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+
+    return digest.hexdigest()[:16]
+
+
+def snapshot_path(key, directory=SNAPSHOT_DIR):
+    '''
+        Returns the path of the snapshot file for a given key.
+
+        args:
+            key: The fingerprint of the snapshot
+            directory: The directory containing the snapshots
+        returns:
+            The path of the snapshot file
+    '''
+    return os.path.join(directory, f'{SNAPSHOT_PREFIX}{key}{SNAPSHOT_SUFFIX}')
+
+
+def load_snapshot(key, directory=SNAPSHOT_DIR):
+    '''
+        Reads the snapshot matching the key into a dataframe, if it exists.
+
+        args:
+            key: The fingerprint of the snapshot
+            directory: The directory containing the snapshots
+        returns:
+            The preprocessed dataframe, or None if there is no usable snapshot
+    '''
+    path = snapshot_path(key, directory)
+    if not os.path.exists(path):
+        return None
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+
+    try:
+        return feather.read_table(path).to_pandas()
+    except (OSError, pa.ArrowException):
+        # A corrupted or incompatible snapshot is simply rebuilt
+        return None
+
+
+def load_snapshot_metadata(key, directory=SNAPSHOT_DIR):
+    '''
+        Reads the metadata stored with the snapshot matching the key, without its data.
+
+        args:
+            key: The fingerprint of the snapshot
+            directory: The directory containing the snapshots
+        returns:
+            The metadata given to write_snapshot, {} if there is none or no usable snapshot
+    '''
+    path = snapshot_path(key, directory)
+    if not os.path.exists(path):
+        return {}
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return {}
+
+    try:
+        with pa.memory_map(path) as source:
+            schema_metadata = pa.ipc.open_file(source).schema.metadata or {}
+        return json.loads(schema_metadata.get(METADATA_KEY, b'{}'))
+    except (OSError, ValueError, pa.ArrowException):
+        return {}
+
+
+def write_snapshot(df, key, directory=SNAPSHOT_DIR, metadata=None):
+    '''
+        Writes the preprocessed dataframe to an uncompressed Feather file, which
+        is fast to read back. Snapshots with another key are removed. A dataframe
+        that Arrow cannot serialize is not cached.
+
+        args:
+            df: The preprocessed dataframe
+            key: The fingerprint of the snapshot
+            directory: The directory containing the snapshots
+            metadata: A JSON serializable dictionary stored with the data, see load_snapshot_metadata
+        returns:
+            True if the snapshot was written, False otherwise
+    '''
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return False
+
+    path = snapshot_path(key, directory)
+    # Write to a temporary file first, several processes may start at once
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pandas(df.reset_index(drop=True))
+        if metadata:
+            table = table.replace_schema_metadata({**table.schema.metadata, METADATA_KEY: json.dumps(metadata)})
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+    except (OSError, pa.ArrowException):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    remove_stale_files(path)
+    return True
+
+
+def remove_stale_files(path, prefix=SNAPSHOT_PREFIX, suffix=SNAPSHOT_SUFFIX):
+    '''
+        Removes the files of the directory of a snapshot with the same prefix and
+        suffix but another key.
+
+        args:
+            path: The path of the current file
+            prefix: The prefix of the file names
+            suffix: The suffix of the file names
+    '''
+    directory = os.path.dirname(path)
+    for file_name in os.listdir(directory):
+        stale_path = os.path.join(directory, file_name)
+        if file_name.startswith(prefix) and file_name.endswith(suffix) and stale_path != path:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
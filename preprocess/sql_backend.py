@@ -0,0 +1,293 @@
+'''
+    A backend running the filters and aggregations of the figures as SQL in an
+    embedded database: DuckDB if it is installed, SQLite otherwise. Set
+    OLYMPICS_SQL_ENGINE=duckdb or sqlite to choose the engine.
+
+    The queries only return the counts of the groups of a sport, the reshaping
+    of these counts (pivots, percentages...) is done by the functions of
+    preprocess.py, which accept counted rows like the aggregation cube.
+'''
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+import preprocess.backends as backends
+import preprocess.pandas_backend as pandas_backend
+import preprocess.preprocess as preprocess
+
+# Columns of the athlete rows stored in the database
+TABLE_COLUMNS = ["Sport", "Event", "Year", "Age", "Medal", "Gender", "NOC", "Region",
+                 "Name", "Athlete ID", "Participation_Number"]
+
+# The athlete rows with their position in the data ('Row') and their 'Age Group'.
+# The filters on this query are pushed down to the table by both engines
+AGE_GROUP_CASES = " ".join(f"WHEN \"Age\" >= {low} AND \"Age\" < {high} THEN '{label}'"
+                           for low, high, label in zip(preprocess.AGE_BINS[:-1], preprocess.AGE_BINS[1:],
+                                                       preprocess.AGE_LABELS))
+ATHLETE_ROWS = f'SELECT *, CASE {AGE_GROUP_CASES} END AS "Age Group" FROM athletes'
+
+
+def default_engine():
+    '''
+        Returns the configured SQL engine, or the fastest available one.
+
+        returns:
+            The value of OLYMPICS_SQL_ENGINE if it is set, 'duckdb' if duckdb is installed, 'sqlite' otherwise
+    '''
+    engine = os.environ.get("OLYMPICS_SQL_ENGINE")
+    if engine:
+        return engine
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return "sqlite"
+    return "duckdb"
+
+
+def _quote(column):
+    return '"' + column + '"'
+
+
+def connect(olympics_data, engine=None):
+    '''
+        Creates an in-memory database with a copy of the athlete rows, stored by
+        column in DuckDB and indexed by sport in SQLite.
+
+        args:
+            olympics_data: The preprocessed dataframe
+            engine: 'duckdb' or 'sqlite', default_engine() if None
+        returns:
+            A dictionary with the 'engine', its 'connection' and the 'lock' serializing the queries
+        raises:
+            ValueError: If the engine is unknown
+    '''
+    engine = engine or default_engine()
+    athletes = olympics_data[TABLE_COLUMNS].assign(Row=range(len(olympics_data)))
+
+    if engine == "duckdb":
+        import duckdb
+        connection = duckdb.connect()
+        # Scanning the dataframe converts its categories on every query, the rows are copied once
+        connection.register("athlete_frame", athletes)
+        connection.execute("CREATE TABLE athletes AS SELECT * FROM athlete_frame")
+        connection.unregister("athlete_frame")
+    elif engine == "sqlite":
+        # SQLite stores plain values, the categories are restored on the results
+        for column in athletes.columns:
+            if isinstance(athletes[column].dtype, pd.CategoricalDtype):
+                athletes[column] = athletes[column].astype(object).where(athletes[column].notna(), None)
+        athletes["Age"] = athletes["Age"].astype("float64")
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        athletes.to_sql("athletes", connection, index=False)
+        connection.execute('CREATE INDEX athletes_sport ON athletes ("Sport")')
+    else:
+        raise ValueError(f"Unknown SQL engine '{engine}', expected 'duckdb' or 'sqlite'")
+
+    return {"engine": engine, "connection": connection, "lock": threading.Lock()}
+
+
+def _query(dataset, sql, params=()):
+    '''
+        Runs a query and returns its result with the column types of the data.
+    '''
+    database = dataset["sql"]
+    with database["lock"]:
+        cursor = database["connection"].execute(sql, list(params))
+        if database["engine"] == "duckdb":
+            result = cursor.df()
+        else:
+            result = pd.DataFrame.from_records(cursor.fetchall(), columns=[column[0] for column in cursor.description])
+    return backends.restore_dtypes(result, dataset["olympics_data"])
+
+
+def _count_rows(dataset, sport, by, conditions=(), params=()):
+    '''
+        Counts the athlete rows of a sport per group. The groups are in the order
+        of their first row, like the groups of the aggregation cube.
+    '''
+    columns = ", ".join(_quote(column) for column in ["Sport"] + by)
+    where = " AND ".join(['"Sport" = ?'] + list(conditions))
+    sql = (f'SELECT {columns}, COUNT(*) AS "Count" FROM ({ATHLETE_ROWS}) AS athlete_rows '
+           f'WHERE {where} GROUP BY {columns} ORDER BY MIN("Row")')
+    return _query(dataset, sql, [sport] + list(params))
+
+
+# The athlete file is loaded and preprocessed with pandas
+load_athletes = pandas_backend.load_athletes
+
+
+def prepare(dataset, engine=None):
+    '''
+        Loads the athlete rows of a dataset into a new database.
+
+        args:
+            dataset: The dataset, from dataset.build_dataset
+            engine: 'duckdb' or 'sqlite', default_engine() if None
+        returns:
+            The dataset with its database ('sql')
+    '''
+    return {**dataset, "sql": connect(dataset["olympics_data"], engine)}
+
+
+def restrict_to_sport(dataset, sport):
+    '''
+        Restricts a dataset to the rows of a sport, see pandas_backend.restrict_to_sport.
+        The database selects the rows of the sport in each query ('WHERE "Sport" = ?'),
+        so the dataset is returned as is.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The dataset
+    '''
+    return dataset
+
+
+def select_sport(dataset, sport, columns=None):
+    '''
+        Returns the athlete rows of a sport.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            columns: The columns to return, TABLE_COLUMNS if None
+        returns:
+            The athlete rows of the sport, in the order of the data
+    '''
+    selected = ", ".join(_quote(column) for column in columns or TABLE_COLUMNS)
+    return _query(dataset, f'SELECT {selected} FROM athletes WHERE "Sport" = ? ORDER BY "Row"', [sport])
+
+
+def group_by_year_and_age_group(dataset, sport, event="All"):
+    '''
+        Counts the athletes of a sport per year and age group, see preprocess.group_by_year_and_age_group.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            event: The selected event of the sport, or "All"
+        returns:
+            The counts per year and age group with the age midpoints
+    '''
+    if event == "All":
+        counts = _count_rows(dataset, sport, ["Year", "Age Group"])
+    else:
+        counts = _count_rows(dataset, sport, ["Year", "Age Group"], ['"Event" = ?'], [event])
+    return preprocess.group_by_year_and_age_group(counts)
+
+
+def group_by_medal_and_age_group(dataset, sport):
+    '''
+        Counts the medals of a sport per age group, see preprocess.group_by_medal_and_age_group.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The counts per medal and age group with the age midpoints
+    '''
+    counts = _count_rows(dataset, sport, ["Medal", "Age Group"], ['"Medal" IS NOT NULL'])
+    return preprocess.group_by_medal_and_age_group(counts)
+
+
+def preprocess_sankey_data(dataset, year, sport, country, top_k=3):
+    '''
+        Computes the medal table of the Sankey diagram, see preprocess.preprocess_sankey_data.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            year: The participation year, or "All Editions"
+            sport: The selected sport
+            country: The NOC of the participating country
+            top_k: The number of countries with the most medals to compare with
+        returns:
+            The medal table, or None if there is no data
+    '''
+    if year == "All Editions":
+        counts = _count_rows(dataset, sport, ["Year", "NOC", "Region", "Medal"])
+    else:
+        counts = _count_rows(dataset, sport, ["Year", "NOC", "Region", "Medal"], ['"Year" = ?'], [int(year)])
+    return preprocess.preprocess_sankey_data(counts, year, sport, country, top_k)
+
+
+def dot_plot_preprocess(dataset, sport):
+    '''
+        Counts the events of a sport per gender, see preprocess.dot_plot_preprocess.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The event counts per gender
+    '''
+    return preprocess.dot_plot_preprocess(_count_rows(dataset, sport, ["Event"]), sport)
+
+
+def preprocess_gender_by_year(dataset, sport):
+    '''
+        Computes the gender shares of a sport per year, see preprocess.preprocess_gender_by_year.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The male/female participation percentages per year
+    '''
+    return preprocess.preprocess_gender_by_year(_count_rows(dataset, sport, ["Year", "Gender"]), sport)
+
+
+def preprocess_bar_chart_data(dataset, sport, max_participations=4):
+    '''
+        Computes the medal shares of a sport per participation, see preprocess.preprocess_bar_chart_data.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+            max_participations: The largest participation number to keep
+        returns:
+            The medal counts and percentages per participation number
+    '''
+    counts = _count_rows(dataset, sport, ["Participation_Number", "Medal"], ['"Participation_Number" <= ?'],
+                         [max_participations])
+    return preprocess.preprocess_bar_chart_data(counts, sport, max_participations=max_participations)
+
+
+def compute_age_range_per_sport(dataset):
+    '''
+        Computes the minimum and maximum age of the athletes of each sport.
+
+        args:
+            dataset: The dataset, prepared by prepare
+        returns:
+            Dataframe with the min/max ages for each sport, see preprocess.compute_age_range_per_sport
+    '''
+    age_ranges = _query(dataset, 'SELECT "Sport", MIN("Age") AS "Age_min", MAX("Age") AS "Age_max" '
+                                 'FROM athletes WHERE "Sport" IS NOT NULL GROUP BY "Sport"')
+    age_ranges = age_ranges.sort_values("Sport", ignore_index=True)
+    age_ranges["Sport"] = age_ranges["Sport"].astype(str)
+    for column in ("Age_min", "Age_max"):
+        age_ranges[column] = pd.to_numeric(age_ranges[column].astype("Int64"), downcast="integer")
+    return age_ranges
+
+
+def preprocess_stacked_bar_chart(dataset, sport):
+    '''
+        Counts the medals of the athletes of a sport, see preprocess.preprocess_stacked_bar_chart.
+
+        args:
+            dataset: The dataset, prepared by prepare
+            sport: The selected sport
+        returns:
+            The number of medals per athlete and medal type
+    '''
+    medals = ", ".join(f'SUM(CASE WHEN "Medal" = \'{medal}\' THEN 1 ELSE 0 END) AS {_quote(medal)}'
+                       for medal in preprocess.MEDAL_ORDER[:-1])
+    careers = _query(dataset, f'SELECT "Sport", "Athlete ID", "Name", {medals} FROM athletes '
+                              'WHERE "Sport" = ? AND "Medal" IS NOT NULL GROUP BY "Sport", "Athlete ID", "Name"',
+                     [sport])
+    careers[preprocess.MEDAL_ORDER[:-1]] = careers[preprocess.MEDAL_ORDER[:-1]].astype("int32")
+    careers["Medals"] = careers[preprocess.MEDAL_ORDER[:-1]].sum(axis=1)
+    return preprocess.preprocess_stacked_bar_chart(careers, sport)
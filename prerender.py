@@ -0,0 +1,167 @@
+'''
+    Renders the figures of the app ahead of time, as JSON and standalone HTML
+    files, so that the common views can be served as static files. Every figure
+    is rendered for every sport of sport.Sport, each Absolute/Relative mode and,
+    for the Sankey diagram, each edition and each given country. The
+    sub-category figure is only rendered for all the events ("All"), the
+    other views are left to the app.
+
+    The sports are rendered in parallel by a pool of processes, each one loading
+    the dataset from the snapshot.
+
+    Usage:
+        python prerender.py [--output static/figures] [--sports Judo,Swimming]
+                            [--countries CAN,FRA|all] [--workers 4] [--plotlyjs cdn|inline]
+                            [--backend pandas]
+
+    The files are written to OUTPUT/<sport>/<figure>-<parameters>.json and .html,
+    OUTPUT/index.json lists them with their parameters.
+'''
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import preprocess.backends as backends
+import preprocess.dataset as dataset
+import preprocess.sport as sport
+import visualizations.figures as figures
+
+DEFAULT_OUTPUT = './static/figures'
+DEFAULT_COUNTRIES = 'CAN'
+MODES = ("Absolute", "Relative")
+
+# The backend and the dataset of a worker process, loaded once by _init_worker
+_worker = {}
+
+
+def slug(value):
+    '''
+        Converts a value to a lowercase file name part.
+    '''
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-')
+
+
+def figure_jobs(discipline, countries, years):
+    '''
+        Lists the figures to render for a sport.
+
+        args:
+            discipline: The sport
+            countries: The NOC codes of the countries of the Sankey diagrams
+            years: The editions of the Sankey diagrams, see figures.sankey_years
+        returns:
+            A list of (section, parameters, builder, builder arguments), the section
+            being the key of the section in the app
+    '''
+    jobs = []
+    for mode in MODES:
+        for show_avg in (False, True):
+            jobs.append(("age_distribution", {"mode": mode, "show_avg": show_avg},
+                         figures.build_age_distribution_figure, (discipline, mode, show_avg)))
+        jobs.append(("event_age", {"event": "All", "mode": mode},
+                     figures.build_event_age_figure, (discipline, "All", mode)))
+        for country in countries:
+            for year in years:
+                jobs.append(("performance", {"country": country, "year": year, "mode": mode},
+                             figures.build_sankey_figure, (discipline, country, year, mode == "Relative")))
+    jobs += [
+        ("medal_age", {}, figures.build_medal_age_figure, (discipline,)),
+        ("gender_disparities", {}, figures.build_gender_dot_plot_figure, (discipline,)),
+        ("gender_evolution", {}, figures.build_gender_by_year_figure, (discipline,)),
+        ("participation_medals", {}, figures.build_participation_medal_figure, (discipline,)),
+        ("career_span", {}, figures.build_career_span_figure, (discipline,)),
+        ("hall_of_fame", {}, figures.build_hall_of_fame_figure, (discipline,)),
+    ]
+    return jobs
+
+
+def _init_worker(backend_name):
+    '''
+        Loads the dataset in a worker process.
+    '''
+    backend = backends.load_backend(backend_name)
+    current, _ = dataset.load_dataset(backend.load_athletes)
+    _worker["backend"] = backend
+    _worker["dataset"] = backend.prepare(current)
+
+
+def render_sport(discipline, countries, years, output, plotlyjs):
+    '''
+        Renders the figures of a sport in the worker process.
+
+        args:
+            discipline: The sport
+            countries: The NOC codes of the countries of the Sankey diagrams
+            years: The editions of the Sankey diagrams
+            output: The output directory
+            plotlyjs: How the HTML files include plotly.js, 'cdn' or 'inline'
+        returns:
+            The index entries of the written figures, the figures without data are skipped
+    '''
+    directory = os.path.join(output, slug(discipline))
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    for section, parameters, builder, arguments in figure_jobs(discipline, countries, years):
+        result = builder(_worker["backend"], _worker["dataset"], *arguments)
+        # The Sankey builder also returns whether the country has data
+        figure = result[0] if isinstance(result, tuple) else result
+        if figure is None:
+            continue
+
+        name = "-".join([section] + [slug(value) for value in parameters.values()])
+        figure.write_json(os.path.join(directory, f"{name}.json"))
+        figure.write_html(os.path.join(directory, f"{name}.html"), include_plotlyjs='cdn' if plotlyjs == 'cdn' else True)
+        entries.append({
+            "sport": discipline,
+            "section": section,
+            "parameters": parameters,
+            "json": f"{slug(discipline)}/{name}.json",
+            "html": f"{slug(discipline)}/{name}.html",
+        })
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='output directory')
+    parser.add_argument('--sports', default=None, help='comma separated sports, all of sport.Sport by default')
+    parser.add_argument('--countries', default=DEFAULT_COUNTRIES,
+                        help="comma separated NOC codes of the Sankey diagrams, or 'all'")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--plotlyjs', choices=('cdn', 'inline'), default='cdn',
+                        help='load plotly.js from its CDN or embed it in each HTML file')
+    parser.add_argument('--backend', default=backends.backend_name(), help='preprocessing backend')
+    args = parser.parse_args()
+
+    # Loads the data once before the workers, so that they share the snapshot
+    start = time.perf_counter()
+    current, _ = dataset.load_dataset(backends.load_backend(args.backend).load_athletes)
+    catalog = current["catalog"]
+    sports = args.sports.split(',') if args.sports else [sport_.value for sport_ in sport.Sport]
+    years = figures.sankey_years(catalog["years"])
+    if args.countries == 'all':
+        countries = sorted(current["olympics_data"]["NOC"].dropna().astype(str).unique())
+    else:
+        countries = args.countries.split(',')
+
+    entries = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.backend,)) as executor:
+        futures = {executor.submit(render_sport, discipline, countries, years, args.output, args.plotlyjs): discipline
+                   for discipline in sports}
+        for done, future in enumerate(as_completed(futures), 1):
+            sport_entries = future.result()
+            entries += sport_entries
+            print(f'[{done}/{len(sports)}] {futures[future]}: {len(sport_entries)} figures', flush=True)
+
+    entries.sort(key=lambda entry: (sports.index(entry["sport"]), entry["json"]))
+    with open(os.path.join(args.output, 'index.json'), 'w') as file:
+        json.dump({"backend": args.backend, "countries": countries, "years": years, "figures": entries}, file, indent=1)
+    print(f'{len(entries)} figures written to {args.output} in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,14 @@
+import numpy as np
 import plotly.graph_objs as go
 
+MEDALS = ['Gold', 'Silver', 'Bronze']
+MEDAL_COLORS = {'Gold': 'gold', 'Silver': 'silver', 'Bronze': '#cd7f32'}
+MEDAL_EMOJIS = {'Gold': '🏅', 'Silver': '🥈', 'Bronze': '🥉'}
+
+# Position shift, in bar widths, of the first, second and third medal of a group
+PODIUM_POSITIONS = np.array([1, 0, 2])
+BAR_WIDTH = 0.2
+
 def visualize_data(data):
     '''
         Creates a grouped bar chart with medal percentage breakdowns by participation number.
@@ -12,64 +21,50 @@ def visualize_data(data):
             fig: The grouped bar chart
     '''
 
-    traces = []
-    
-    for index, row in data.iterrows():
-        # Extract medal percentages and rank them from highest to lowest
-        percentages = {
-            'Gold': row['Gold_Percentage'],
-            'Silver': row['Silver_Percentage'],
-            'Bronze': row['Bronze_Percentage']
-        }
-        sorted_percentages = sorted(percentages.items(), key=lambda x: x[1], reverse=True)
-        first, second, third = sorted_percentages
-        
-        # Assign x-axis position shifts to group bars based on ranking
-        x_positions = {
-            first[0]: 1,
-            second[0]: 0,
-            third[0]: 2
-            }
+    # Medal percentages, one row per participation group and one column per medal type
+    percentages = data[[f'{medal}_Percentage' for medal in MEDALS]].to_numpy(dtype=float)
+    participation_numbers = data['Participation_Number'].to_numpy()
 
-        # Create one bar trace per medal type for the current participation group
-        participation_traces = [
-            go.Bar(
-                y=[percentages[medal]],
-                x=[row['Participation_Number'] + x_positions[medal] * 0.2],
-                name=medal,
-                marker=dict(color={'Gold': 'gold', 'Silver': 'silver', 'Bronze': '#cd7f32'}[medal]),
-                showlegend=True if index == 0 else False,
-                hovertemplate="Participation: %{x:.0f}<br><span style='display:block; text-align:center;'><b>%{y:.2f}%</b></span><extra></extra>"
+    # Rank the medals of each group from highest to lowest, ties keep the medal order
+    order = np.argsort(-percentages, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(len(MEDALS)), axis=1)
 
-            ) for medal, _ in sorted_percentages
-            ]
-        traces.extend(participation_traces)
+    # Assign x-axis position shifts to group bars based on ranking
+    x_positions = participation_numbers[:, None] + PODIUM_POSITIONS[ranks] * BAR_WIDTH
 
-        # Add emoji annotations above each bar to represent medal types
-        medal_emojis = {
-            'Gold': '🏅',
-            'Silver': '🥈',
-            'Bronze': '🥉'
-        }
+    # Create one bar trace per medal type for all the participation groups
+    traces = [
+        go.Bar(
+            y=percentages[:, column].tolist(),
+            x=x_positions[:, column].tolist(),
+            width=BAR_WIDTH,
+            offset=-BAR_WIDTH / 2,
+            name=medal,
+            marker=dict(color=MEDAL_COLORS[medal]),
+            hovertemplate="Participation: %{x:.0f}<br><span style='display:block; text-align:center;'><b>%{y:.2f}%</b></span><extra></extra>"
+        ) for column, medal in enumerate(MEDALS)
+    ]
 
-        for medal, _ in zip(['Gold', 'Silver', 'Bronze'], [first, second, third]):
-            traces.append(
-                go.Scatter(
-                    x=[row['Participation_Number'] + x_positions[medal] * 0.2],
-                    y=[percentages[medal] + 0.2],
-                    text=[medal_emojis[medal]],
-                    mode="text",
-                    showlegend=False
-                )
-            )
+    # Add emoji annotations above each bar to represent medal types
+    traces.append(
+        go.Scatter(
+            x=x_positions.ravel().tolist(),
+            y=(percentages + 0.2).ravel().tolist(),
+            text=[MEDAL_EMOJIS[medal] for medal in MEDALS] * len(data),
+            mode="text",
+            showlegend=False
+        )
+    )
 
     # Set up the chart layout and styling
+    last_participation = participation_numbers.max() if len(data) else 4
     layout = go.Layout(
         xaxis=dict(
             title="Participation Number",
             tickvals=data['Participation_Number'],
             ticktext=data['Participation_Number'].astype(str),
-            range=[0.5, 4.5]
+            range=[0.5, max(last_participation, 4) + 0.5]
         ),
         yaxis=dict(title="Percentage (%)"),
         barmode="group",
@@ -83,4 +78,4 @@ def visualize_data(data):
         traces
     )
     
-    return fig
\ No newline at end of file
+    return fig
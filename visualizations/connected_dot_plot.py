@@ -1,8 +1,31 @@
-import plotly.graph_objects as go
+import numpy as np
 import plotly.express as px
 import preprocess.sport as sp
+import visualizations.rendering as rendering
 from style.theme import MALE, FEMALE
 
+def _connector_segments(starts, ends, categories):
+    '''
+    Interleaves the segments going from start to end on each category with gaps,
+    so that all the segments are drawn by a single line trace
+
+    args:
+        starts: The start of each segment
+        ends: The end of each segment
+        categories: The category of each segment
+
+    returns:
+        x: The x coordinates, None between two segments
+        y: The y coordinates, None between two segments
+    '''
+    x = np.full(3 * len(categories), None, dtype=object)
+    x[0::3] = np.asarray(starts, dtype=object)
+    x[1::3] = np.asarray(ends, dtype=object)
+    y = np.full(3 * len(categories), None, dtype=object)
+    y[0::3] = np.asarray(categories, dtype=object)
+    y[1::3] = y[0::3]
+    return x.tolist(), y.tolist()
+
 def connected_dot_plot(event_counts):
     '''
     Creates a connected dot plot to compare the number of men's and women's participations 
@@ -18,6 +41,8 @@ def connected_dot_plot(event_counts):
     both_genders = event_counts[(event_counts["Men's"] > 0) & (event_counts["Women's"] > 0)]
     event_counts_melted = both_genders.melt(id_vars="Clean_Event", var_name="Gender", value_name="Count")
     event_counts_melted = event_counts_melted[event_counts_melted["Count"] > 0]
+    # The dots and the two ends of each line, all drawn with WebGL when there are many
+    point_count = len(event_counts_melted) + 2 * len(both_genders)
 
     # Create the base scatter plot
     fig5 = px.scatter(
@@ -27,21 +52,21 @@ def connected_dot_plot(event_counts):
         color="Gender",
         labels={"Clean_Event": "Event", "Count": "Number of Events"},
         color_discrete_map={"Men's": MALE, "Women's": FEMALE},
-        symbol="Gender"
+        symbol="Gender",
+        render_mode=rendering.render_mode(point_count)
     )
 
 
-    # Add lines between points to show the comparison between genders for each event
-    for event in both_genders["Clean_Event"]:
-        men_count = both_genders.loc[both_genders["Clean_Event"] == event, "Men's"].values[0]
-        women_count = both_genders.loc[both_genders["Clean_Event"] == event, "Women's"].values[0]
-        fig5.add_trace(go.Scatter(
-            x=[men_count, women_count],
-            y=[event, event],
-            mode="lines",
-            line=dict(color="gray", width=2, dash="dot"),
-            showlegend=False
-        ))
+    # Add lines between points to show the comparison between genders for each event,
+    # all the lines are drawn by a single trace
+    x, y = _connector_segments(both_genders["Men's"], both_genders["Women's"], both_genders["Clean_Event"])
+    fig5.add_trace(rendering.scatter_trace(point_count)(
+        x=x,
+        y=y,
+        mode="lines",
+        line=dict(color="gray", width=2, dash="dot"),
+        showlegend=False
+    ))
 
     # Customize layout: sizing, axis labels, font styling, and background
     fig5.update_layout(
@@ -89,6 +114,8 @@ def connected_dot_plot_8(age_stats, age_stats_long, discipline):
     filtered_sports = [sport_.value for sport_ in sp.Sport]   
     age_stats = age_stats[age_stats['Sport'].isin(filtered_sports)].sort_values(by='Sport', ascending=False)
     age_stats_long = age_stats_long[age_stats_long['Sport'].isin(filtered_sports)].sort_values(by='Sport', ascending=False)
+    # The dots and the two ends of each line, all drawn with WebGL when there are many
+    point_count = len(age_stats_long) + 2 * len(age_stats)
     
     # Create the base scatter plot for min and max ages
     fig = px.scatter(
@@ -97,20 +124,20 @@ def connected_dot_plot_8(age_stats, age_stats_long, discipline):
         y='Sport',
         color='Age',
         symbol='Age',
-        color_discrete_map={'Age_min': 'blue', 'Age_max': 'green'}
+        color_discrete_map={'Age_min': 'blue', 'Age_max': 'green'},
+        render_mode=rendering.render_mode(point_count)
     )
 
-    # Add dotted lines connecting min and max ages per sport
-    for sport in age_stats['Sport']:
-        subset = age_stats[age_stats['Sport'] == sport]
+    # Add dotted lines connecting min and max ages per sport, one trace for the
+    # other sports and one for the selected discipline, highlighted in red
+    is_selected = age_stats['Sport'].str.strip().str.lower() == discipline.strip().lower()
+    for selected, line_color in ((False, 'gray'), (True, 'red')):
+        subset = age_stats[is_selected == selected]
         if not subset.empty:
-            min_val = subset['Age_min'].values[0]
-            max_val = subset['Age_max'].values[0]
-            # Highlight the selected discipline in red
-            line_color = 'red' if sport.strip().lower() == discipline.strip().lower() else 'gray'
-            fig.add_trace(go.Scatter(
-                x=[min_val, max_val],
-                y=[sport, sport],
+            x, y = _connector_segments(subset['Age_min'], subset['Age_max'], subset['Sport'])
+            fig.add_trace(rendering.scatter_trace(point_count)(
+                x=x,
+                y=y,
                 mode='lines',
                 line=dict(color=line_color, dash='dot'),
                 showlegend=False
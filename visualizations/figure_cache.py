@@ -0,0 +1,183 @@
+'''
+    Provides a process-wide cache of the serialized figures, shared by all the sessions.
+'''
+import json
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import plotly.graph_objects as go
+
+# Enough for the warm-up of every sport with the default widget values (see app.warm_up_jobs)
+DEFAULT_MAX_ENTRIES = 512
+
+# Returned by FigureCache.get on a miss, a builder may return None (no data)
+_MISSING = object()
+
+
+class SerializedFigure:
+    '''
+        The JSON of a figure stored in the cache.
+    '''
+    __slots__ = ('json',)
+
+    def __init__(self, figure):
+        self.json = figure.to_json()
+
+    def to_figure(self):
+        '''
+            Rebuilds the figure. The JSON comes from a validated figure, so Plotly's
+            validation is skipped, which is most of the construction cost.
+
+            Returns:
+                The figure
+        '''
+        return go.Figure(json.loads(self.json), _validate=False)
+
+
+class FigureCache:
+    '''
+        LRU cache of serialized figures keyed by the builder and its inputs,
+        with hit and miss counters.
+    '''
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        '''
+            Returns the cached entry for the key and marks it as recently used.
+            A stored None is a hit.
+
+            Args:
+                key: The cache key
+                default: The value returned on a miss
+            Returns:
+                The cached entry, or default on a miss
+        '''
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, entry):
+        '''
+            Stores an entry, evicting the least recently used ones above the size limit.
+
+            Args:
+                key: The cache key
+                entry: The entry to store
+        '''
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        '''
+            Removes every entry and resets the counters.
+        '''
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        '''
+            Returns the usage counters of the cache.
+
+            Returns:
+                A dictionary with the hits, misses, hit rate and number of entries
+        '''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+
+FIGURE_CACHE = FigureCache()
+
+
+def _serialize(value):
+    '''
+        Replaces the figures of a builder's result by their JSON.
+    '''
+    if isinstance(value, go.Figure):
+        return SerializedFigure(value)
+    if isinstance(value, tuple):
+        return tuple(_serialize(item) for item in value)
+    return value
+
+
+def _deserialize(value):
+    '''
+        Rebuilds the figures of a cached result.
+    '''
+    if isinstance(value, SerializedFigure):
+        return value.to_figure()
+    if isinstance(value, tuple):
+        return tuple(_deserialize(item) for item in value)
+    return value
+
+
+def cached_figure(builder=None, cache=FIGURE_CACHE, version=None):
+    '''
+        Decorates a figure builder so that its result is cached as JSON, keyed by
+        the builder, its inputs and the version of its data. The inputs must be
+        hashable, e.g. the widget values.
+        The result can be a figure, None, or a tuple containing figures.
+        The decorated builder's prefetch(...) only fills the cache, without
+        rebuilding the figure or counting a hit or a miss.
+        Without a builder, returns the decorator, e.g. @cached_figure(version=...).
+
+        Args:
+            builder: The function building the figure
+            cache: The cache to use
+            version: A function returning a hashable version of the data read by the builder
+                (e.g. the merged edition files), so that a figure of older data is never
+                served. None if the data does not change
+        Returns:
+            The decorated builder
+    '''
+    if builder is None:
+        return lambda builder: cached_figure(builder, cache, version)
+
+    def make_key(args, kwargs):
+        data_version = None if version is None else version()
+        return (builder.__module__, builder.__qualname__, data_version, args, tuple(sorted(kwargs.items())))
+
+    @wraps(builder)
+    def wrapper(*args, **kwargs):
+        key = make_key(args, kwargs)
+        entry = cache.get(key, _MISSING)
+        if entry is _MISSING:
+            entry = _serialize(builder(*args, **kwargs))
+            cache.put(key, entry)
+        return _deserialize(entry)
+
+    @wraps(builder)
+    def prefetch(*args, **kwargs):
+        key = make_key(args, kwargs)
+        if key not in cache:
+            cache.put(key, _serialize(builder(*args, **kwargs)))
+
+    wrapper.prefetch = prefetch
+    return wrapper
@@ -0,0 +1,188 @@
+'''
+    Builds the figures of the sections of the app. Each builder runs the
+    preprocessing of a section with a backend (see preprocess/backends.py) on a
+    prepared dataset, then the figure construction.
+
+    Each builder first restricts the dataset to the selected sport (the
+    'filter' phase of the timings), then runs the preprocessing on it.
+
+    The app caches them on the widget inputs, prerender.py renders them for
+    every sport ahead of time.
+
+    The modules of the figures import Plotly Express, they are imported by the
+    builders on first use so that the app starts without them (see
+    benchmarks/import_times.py).
+'''
+import preprocess.preprocess as preprocess
+import monitoring.timing as timing
+
+# The first edition proposed for the Sankey diagram
+FIRST_SANKEY_YEAR = 1999
+
+
+def sankey_years(years):
+    '''
+        Returns the editions proposed for the Sankey diagram.
+
+        Args:
+            years: The years of the data, from the catalog of the dataset
+        Returns:
+            "All Editions", then the years since FIRST_SANKEY_YEAR, most recent first.
+    '''
+    return ["All Editions"] + sorted([year for year in years if year >= FIRST_SANKEY_YEAR], reverse=True)
+
+
+def build_age_distribution_figure(backend, dataset, discipline, mode, show_avg):
+    '''
+        Builds the age distribution bubble chart (Visualization 1).
+
+        Returns:
+            The figure, or None if there is no data for the discipline.
+    '''
+    import visualizations.scatter_charts as scatter_charts
+
+    with timing.phase("filter"):
+        dataset = backend.restrict_to_sport(dataset, discipline)
+        filtered_discipline_data = backend.select_sport(dataset, discipline, ["Year", "Age"])
+    with timing.phase("preprocess"):
+        grouped = backend.group_by_year_and_age_group(dataset, discipline)
+        if grouped.empty:
+            return None
+        grouped, size_column = preprocess.compute_relative_size_column(grouped, mode)
+    return scatter_charts.create_age_distribution_bubble(filtered_discipline_data, grouped, size_column, show_avg, mode)
+
+
+def build_event_age_figure(backend, dataset, discipline, event_selected, mode_event):
+    '''
+        Builds the age scatter plot of a sub-category (Visualization 2).
+
+        Returns:
+            The figure, or None if there is no data for the event.
+    '''
+    import visualizations.scatter_charts as scatter_charts
+
+    with timing.phase("filter"):
+        dataset = backend.restrict_to_sport(dataset, discipline)
+    with timing.phase("preprocess"):
+        grouped_event = backend.group_by_year_and_age_group(dataset, discipline, event_selected)
+        if grouped_event.empty:
+            return None
+        grouped_event, size_col_event = preprocess.compute_relative_size_column(grouped_event, mode_event)
+    return scatter_charts.create_event_age_scatter(grouped_event, size_col_event)
+
+
+def build_medal_age_figure(backend, dataset, discipline):
+    '''
+        Builds the medal by age group bubble chart (Visualization 3).
+
+        Returns:
+            The figure, or None if there is no medal data for the discipline.
+    '''
+    import visualizations.bubble_chart as bubble_chart
+
+    with timing.phase("filter"):
+        dataset = backend.restrict_to_sport(dataset, discipline)
+    with timing.phase("preprocess"):
+        medal_by_age_distribution = backend.group_by_medal_and_age_group(dataset, discipline)
+    if medal_by_age_distribution.empty:
+        return None
+    return bubble_chart.create_medal_age_bubble(medal_by_age_distribution)
+
+
+def build_sankey_figure(backend, dataset, discipline, user_country, participation_year, is_relative):
+    '''
+        Builds the performance Sankey diagram (Visualization 4).
+
+        Returns:
+            The figure (None if there is no data) and whether the country has data.
+    '''
+    import visualizations.sankey_diagrams as sankey_diagrams
+
+    with timing.phase("filter"):
+        dataset = backend.restrict_to_sport(dataset, discipline)
+    with timing.phase("preprocess"):
+        medal_table = backend.preprocess_sankey_data(dataset, participation_year, discipline, user_country)
+    return sankey_diagrams.create_sankey_figure(medal_table, participation_year, user_country, is_relative)
+
+
+def build_gender_dot_plot_figure(backend, dataset, discipline):
+    '''
+        Builds the gender disparities connected dot plot (Visualization 5).
+
+        Returns:
+            The figure, or None if the discipline lacks men's or women's events.
+    '''
+    import visualizations.connected_dot_plot as connected_dot_plot
+
+    with timing.phase("filter"):
+        dataset = backend.restrict_to_sport(dataset, discipline)
+    with timing.phase("preprocess"):
+        event_counts = backend.dot_plot_preprocess(dataset, discipline)
+    if "Men's" not in event_counts.columns or "Women's" not in event_counts.columns:
+        return None
+    return connected_dot_plot.connected_dot_plot(event_counts)
+
+
+def build_gender_by_year_figure(backend, dataset, discipline):
+    '''
+        Builds the gender participation stacked bar chart (Visualization 6).
+
+        Returns:
+            The figure.
+    '''
+    import visualizations.stacked_bar_chart as stacked_bar_chart
+
+    with timing.phase("filter"):
+        dataset = backend.restrict_to_sport(dataset, discipline)
+    with timing.phase("preprocess"):
+        processed_data = backend.preprocess_gender_by_year(dataset, discipline)
+    return stacked_bar_chart.visualize_data(processed_data)
+
+
+def build_participation_medal_figure(backend, dataset, discipline):
+    '''
+        Builds the medal odds by participation bar chart (Visualization 7).
+
+        Returns:
+            The figure.
+    '''
+    import visualizations.bar_chart as bar_chart
+
+    with timing.phase("filter"):
+        dataset = backend.restrict_to_sport(dataset, discipline)
+    with timing.phase("preprocess"):
+        bar_chart_data = backend.preprocess_bar_chart_data(dataset, discipline)
+    return bar_chart.visualize_data(bar_chart_data)
+
+
+def build_career_span_figure(backend, dataset, discipline):
+    '''
+        Builds the age range per sport connected dot plot (Visualization 8).
+
+        Returns:
+            The figure.
+    '''
+    import visualizations.connected_dot_plot as connected_dot_plot
+
+    # The figure shows every sport, the selection is the lookup of their age ranges
+    with timing.phase("filter"):
+        age_ranges = backend.compute_age_range_per_sport(dataset)
+    with timing.phase("preprocess"):
+        age_stats, age_stats_long = preprocess.preprocess_connected_dot_plot_data(age_ranges, discipline)
+    return connected_dot_plot.connected_dot_plot_8(age_stats, age_stats_long, discipline)
+
+
+def build_hall_of_fame_figure(backend, dataset, discipline):
+    '''
+        Builds the hall of fame stacked bar chart (Visualization 9).
+
+        Returns:
+            The figure.
+    '''
+    import visualizations.stacked_bar_chart as stacked_bar_chart
+
+    with timing.phase("filter"):
+        dataset = backend.restrict_to_sport(dataset, discipline)
+    with timing.phase("preprocess"):
+        medal_counts = backend.preprocess_stacked_bar_chart(dataset, discipline)
+    return stacked_bar_chart.stacked_bar_chart_9(medal_counts)
@@ -0,0 +1,73 @@
+'''
+    Chooses how the point-heavy figures are drawn. Above WEBGL_THRESHOLD points,
+    their scatter traces are drawn with WebGL (Scattergl) instead of SVG, which
+    keeps the browser responsive with many markers. Set OLYMPICS_WEBGL_THRESHOLD
+    to change the number of points, 0 to always draw them with WebGL.
+'''
+import logging
+import os
+
+import plotly.graph_objects as go
+
+logger = logging.getLogger(__name__)
+
+# The limit of Plotly Express' automatic mode
+DEFAULT_WEBGL_THRESHOLD = 1000
+
+
+def _read_threshold():
+    '''
+        Reads OLYMPICS_WEBGL_THRESHOLD, DEFAULT_WEBGL_THRESHOLD if it is not set or not an integer.
+    '''
+    value = os.environ.get('OLYMPICS_WEBGL_THRESHOLD')
+    if value is None:
+        return DEFAULT_WEBGL_THRESHOLD
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning('Invalid OLYMPICS_WEBGL_THRESHOLD %r, using %d points', value, DEFAULT_WEBGL_THRESHOLD)
+        return DEFAULT_WEBGL_THRESHOLD
+
+
+WEBGL_THRESHOLD = _read_threshold()
+
+
+def use_webgl(point_count, threshold=None):
+    '''
+        Returns whether a figure is drawn with WebGL.
+
+        Args:
+            point_count: The number of points of the figure, over all its traces
+            threshold: The number of points from which WebGL is used, WEBGL_THRESHOLD if None
+        Returns:
+            True if the figure has at least the threshold number of points
+    '''
+    threshold = WEBGL_THRESHOLD if threshold is None else threshold
+    return point_count >= threshold
+
+
+def render_mode(point_count, threshold=None):
+    '''
+        Returns the render_mode of the Plotly Express scatter plots of a figure.
+
+        Args:
+            point_count: The number of points of the figure, over all its traces
+            threshold: The number of points from which WebGL is used, WEBGL_THRESHOLD if None
+        Returns:
+            'webgl' or 'svg'
+    '''
+    return 'webgl' if use_webgl(point_count, threshold) else 'svg'
+
+
+def scatter_trace(point_count, threshold=None):
+    '''
+        Returns the type of the scatter traces added to a figure, so that all the
+        traces of the figure are drawn by the same renderer.
+
+        Args:
+            point_count: The number of points of the figure, over all its traces
+            threshold: The number of points from which WebGL is used, WEBGL_THRESHOLD if None
+        Returns:
+            go.Scattergl or go.Scatter
+    '''
+    return go.Scattergl if use_webgl(point_count, threshold) else go.Scatter
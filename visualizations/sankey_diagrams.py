@@ -1,20 +1,31 @@
-from preprocess.preprocess import preprocess_sankey_data
+from preprocess.preprocess import preprocess_sankey_data, MEDAL_ORDER
+import numpy as np
 import plotly.graph_objects as go
 
 from style.theme import GOLD, SILVER, BRONZE, NO_MEDAL
 import style.hover_template as hover_template
 
-def create_sankey_plot(olympics_data, year, sport, selected_country, is_relative = False):
+def _rgba(color, alpha=0.7):
+    '''
+        Converts a hex color to a transparent rgba color.
+    '''
+    # Reference : https://www.30secondsofcode.org/python/s/hex-to-rgb/
+    rgb = tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+    return f"rgba({rgb[0]}, {rgb[1]}, {rgb[2]}, {alpha})"
+
+def create_sankey_plot(olympics_data, year, sport, selected_country, is_relative = False, sport_index = None, top_k = 3):
     '''
     Creates a Sankey plot to visualize the distribution of medals (Gold, Silver, Bronze, No Medal) 
-    for a selected country and the top 3 countries in a selected sport
+    for a selected country and the top k countries in a selected sport
 
     args:
-        olympics_data: The global dataframe
+        olympics_data: The global dataframe or the aggregation cube
         year: The edition
         sport: The selected sport
         selected_country: The selected country
         is_relative: If True, percentages instead of counts
+        sport_index: The partition index of olympics_data
+        top_k: The number of countries with the most medals to compare with
 
     returns:
         fig: The generated Sankey plot figure
@@ -22,56 +33,41 @@ def create_sankey_plot(olympics_data, year, sport, selected_country, is_relative
     '''
 
     # Preprocess data to get medal counts for the specified year, sport, and country
-    df_medals, medal_counts = preprocess_sankey_data(olympics_data, year, sport, selected_country)
-    
-    if df_medals is None:
-      return None, None
-
-    # Get the list of countries and their corresponding names
-    countries = medal_counts['NOC'].unique().tolist()
-    countries_names = medal_counts['Region'].unique().tolist()
-
-    # Add the nodes for medals ("Gold", "Silver", "Bronze", "No Medal") for each country
-    all_labels = countries + [f'{medal}_{country}' for country in countries for medal in ['Gold', 'Silver', 'Bronze', 'No Medal']]
-
-    # Indices mapping
-    source_indices = []
-    target_indices = []
-    values = []
-
-    medal_order = ['Gold', 'Silver', 'Bronze', 'No Medal']
-
-    for country in countries:
-        # Count the total number of medals
-        medal_count = df_medals[(df_medals['NOC'] == country) & (df_medals['Medal'] != 'No Medal')].shape[0]
-
-        medal_values = {medal: 0 for medal in medal_order}
+    medal_table = preprocess_sankey_data(olympics_data, year, sport, selected_country, top_k=top_k, sport_index=sport_index)
 
-        # Link each country and its medals
-        for medal in ['Gold', 'Silver', 'Bronze']:
+    return create_sankey_figure(medal_table, year, selected_country, is_relative)
 
-            medal_NOC = f'{medal}_{country}'
-
-            if is_relative == False:
-              count = medal_counts[(medal_counts['Medal_NOC'] == medal_NOC)]['Count'].sum()
-            else:
-              count = medal_counts[(medal_counts['Medal_NOC'] == medal_NOC)]['Percentage'].sum()
-              medal_values[medal] = count
+def create_sankey_figure(medal_table, year, selected_country, is_relative = False):
+    '''
+    Creates the Sankey plot from a medal table computed by preprocess_sankey_data
 
-            source_indices.append(all_labels.index(country))
-            target_indices.append(all_labels.index(medal_NOC))
-            values.append(count)
+    args:
+        medal_table: The medal table, or None if there is no data
+        year: The edition
+        selected_country: The selected country
+        is_relative: If True, percentages instead of counts
 
-        # Calculate the 'No Medal' count or percentage for the country
-        if is_relative == False:
-          no_medal_count = len(df_medals[df_medals['NOC'] == country]) - medal_count
-        else:
-          no_medal_count = 100 - sum(medal_values.values())
+    returns:
+        fig: The generated Sankey plot figure
+        is_country_data_available: Boolean indicating whether the selected country's data is available
+    '''
+    if medal_table is None:
+      return None, None
 
-        no_medal_NOC = f'No Medal_{country}'
-        source_indices.append(all_labels.index(country))
-        target_indices.append(all_labels.index(no_medal_NOC))
-        values.append(no_medal_count)
+    # Get the list of countries and their corresponding names
+    countries = medal_table.index.tolist()
+    countries_names = medal_table['Region'].astype(str).tolist()
+    n_countries = len(countries)
+    n_medals = len(MEDAL_ORDER)
+
+    # The nodes are the countries, followed by the nodes for medals ("Gold", "Silver", "Bronze", "No Medal")
+    # of each country. Each medal node is the target of one link from its country
+    counts = medal_table[MEDAL_ORDER].to_numpy()
+    if is_relative:
+      counts = counts / medal_table['Total'].to_numpy()[:, None] * 100
+    source_indices = np.repeat(np.arange(n_countries), n_medals).tolist()
+    target_indices = (n_countries + np.arange(n_countries * n_medals)).tolist()
+    values = counts.ravel().tolist()
 
     # Define colors for each medal type
     medal_colors = {
@@ -81,29 +77,12 @@ def create_sankey_plot(olympics_data, year, sport, selected_country, is_relative
         'No Medal': NO_MEDAL
     }
 
-    # Assign 'black' for countries and 'red' to the selected country
-    node_colors = ['black'] * len(countries)
-    for idx, label in enumerate(countries):
-      if label == selected_country:
-          node_colors[idx] = 'red'
-
-    # Assign colors for medal nodes based on medal type
-    for label in all_labels:
-        if 'Gold' in label:
-            node_colors.append(medal_colors['Gold'])
-        elif 'Silver' in label:
-            node_colors.append(medal_colors['Silver'])
-        elif 'Bronze' in label:
-            node_colors.append(medal_colors['Bronze'])
-        elif 'No Medal' in label:
-            node_colors.append(medal_colors['No Medal'])
+    # Assign 'black' for countries and 'red' to the selected country, then the colors of the medal nodes
+    node_colors = ['red' if country == selected_country else 'black' for country in countries]
+    node_colors += [medal_colors[medal] for medal in MEDAL_ORDER] * n_countries
 
     # Assign link colors based on medal types
-    link_colors = []
-    for idx,color in enumerate(node_colors[len(countries):]):
-       # Reference : https://www.30secondsofcode.org/python/s/hex-to-rgb/
-       rgb = tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-       link_colors.append(f"rgba({rgb[0]}, {rgb[1]}, {rgb[2]}, 0.7)")
+    link_colors = [_rgba(medal_colors[medal]) for medal in MEDAL_ORDER] * n_countries
     
     # Create the Sankey plot
     fig = go.Figure(go.Sankey(
@@ -115,7 +94,7 @@ def create_sankey_plot(olympics_data, year, sport, selected_country, is_relative
             line=dict(color='black', width=0.5),
             label = countries_names,
             color=node_colors,
-            customdata=countries + [country for country in countries for _ in range(4)],
+            customdata=countries + np.repeat(countries, n_medals).tolist(),
             hovertemplate=hover_template.source_sankey_hover(is_relative)
         ),
         link=dict(
@@ -124,7 +103,7 @@ def create_sankey_plot(olympics_data, year, sport, selected_country, is_relative
             value=values,
             color=link_colors,
             line=dict(color="grey", width=0.3),
-            customdata=[(label.split('_')[0], label.split('_')[1]) for label in all_labels if label not in countries],
+            customdata=[(medal, country) for country in countries for medal in MEDAL_ORDER],
             hovertemplate=hover_template.performance_sankey_hover(is_relative)
         )
     ))
@@ -134,8 +113,6 @@ def create_sankey_plot(olympics_data, year, sport, selected_country, is_relative
         font_size=12
     )
     
-    is_country_data_available = False
-    if selected_country in countries:
-      is_country_data_available = True
+    is_country_data_available = selected_country in countries
 
-    return fig, is_country_data_available
\ No newline at end of file
+    return fig, is_country_data_available
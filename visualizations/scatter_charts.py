@@ -2,6 +2,7 @@ import plotly.graph_objects as go
 import plotly.express as px
 import style.hover_template as hover
 import pandas as pd
+import visualizations.rendering as rendering
 
 from preprocess.preprocess import AGE_MIDPOINTS, AGE_BINS, AGE_LABELS
 
@@ -112,6 +113,11 @@ def create_age_distribution_bubble(data, grouped, size_column, show_avg=False, m
     # If no grouped data, return an empty figure with a message
     if grouped.empty:
         return go.Figure().update_layout(title="No data available for the selected filters.")
+
+    if show_avg:
+        avg_age = data.groupby("Year")["Age"].mean().reset_index(name="Average Age")
+    # Many bubbles are drawn with WebGL, the average line with them
+    point_count = len(grouped) + (len(avg_age) if show_avg else 0)
     
     # Create the scatter plot for age distribution and use size and color for the bubbles
     fig = px.scatter(
@@ -128,7 +134,8 @@ def create_age_distribution_bubble(data, grouped, size_column, show_avg=False, m
                 size_column: "Count" if mode == "Absolute" else "Percentage"
             },
         opacity=0.85,
-        size_max=40
+        size_max=40,
+        render_mode=rendering.render_mode(point_count)
     )
 
     fig.update_traces(
@@ -150,9 +157,8 @@ def create_age_distribution_bubble(data, grouped, size_column, show_avg=False, m
 
     # Add a line for the average age
     if show_avg:
-        avg_age = data.groupby("Year")["Age"].mean().reset_index(name="Average Age")
         fig.add_trace(
-            go.Scatter(
+            rendering.scatter_trace(point_count)(
                 x=avg_age["Year"],
                 y=avg_age["Average Age"],
                 mode="lines+markers",
@@ -185,7 +191,8 @@ def create_event_age_scatter(grouped_event, size_col):
                      labels={"Year": "Year", "Age Group": "Age Group", "Age_Midpoint": "Age Group Midpoint",
                              size_col: "Percentage" if size_col == "Percentage" else "Count"},
                      opacity=0.85,
-                     size_max=40)
+                     size_max=40,
+                     render_mode=rendering.render_mode(len(grouped_event)))
 
     fig.update_yaxes(tickvals=list(AGE_MIDPOINTS.values()), ticktext=list(AGE_MIDPOINTS.keys()),
                      title="Age Group (Midpoint)")
@@ -64,7 +64,7 @@ def stacked_bar_chart_9(medal_counts):
     '''
     
     # Identify top 10 athletes by total medal count
-    top_athletes = medal_counts.groupby("Name")["Count"].sum().nlargest(10)
+    top_athletes = medal_counts.groupby("Name", observed=True)["Count"].sum().nlargest(10)
     medal_counts = medal_counts[medal_counts["Name"].isin(top_athletes.index)]
     medal_colors = {"Gold": GOLD, "Silver": SILVER, "Bronze": BRONZE}
 
@@ -0,0 +1,120 @@
+'''
+    Fills the figure cache in a background thread once the data is loaded, so
+    that the first user selecting a sport does not pay for its preprocessing.
+
+    The warm-up prefetches the cached builders of the app one after the other and can
+    be cancelled between two of them. Its progress is logged as JSON lines and
+    can be read with WarmUp.progress.
+'''
+import json
+import logging
+import sys
+import threading
+import time
+
+# Time left to the serving threads between two builders, in seconds
+DEFAULT_PAUSE = 0.05
+
+logger = logging.getLogger('olympics.warm_up')
+if not logger.handlers:
+    # One JSON line per warmed sport on stdout, like the rerun timings
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class WarmUp:
+    '''
+        Background worker running a list of builders. The jobs are
+        (group, builder, arguments) tuples, the progress is logged once all the
+        jobs of a group (e.g. a sport) have run.
+    '''
+
+    def __init__(self, jobs, pause=DEFAULT_PAUSE):
+        self.jobs = jobs
+        self.pause = pause
+        self.done = 0
+        self.failed = 0
+        self.current = None
+        self.state = 'pending'
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='figure-warm-up', daemon=True)
+        self._start = None
+
+    def start(self):
+        '''
+            Starts the worker thread.
+
+            Returns:
+                The warm-up
+        '''
+        self.state = 'running'
+        self._start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        '''
+            Asks the worker to stop, the builder running at that time is completed.
+        '''
+        self._cancelled.set()
+
+    def join(self, timeout=None):
+        '''
+            Waits for the worker to stop.
+
+            Args:
+                timeout: The maximum time to wait, in seconds, None to wait until it stops
+        '''
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def progress(self):
+        '''
+            Returns the progress of the warm-up.
+
+            Returns:
+                A dictionary with the state ('pending', 'running', 'done' or 'cancelled'), the
+                number of builders run, failed and in total, and the group being warmed
+        '''
+        return {
+            'state': self.state,
+            'done': self.done,
+            'failed': self.failed,
+            'total': len(self.jobs),
+            'current': self.current,
+        }
+
+    def _log(self, **fields):
+        record = {
+            'event': 'warm_up',
+            'timestamp': time.time(),
+            'elapsed_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            **self.progress(),
+            **fields,
+        }
+        logger.info(json.dumps(record, default=str))
+
+    def _run(self):
+        for index, (group, builder, arguments) in enumerate(self.jobs):
+            if self._cancelled.is_set():
+                break
+            self.current = group
+            try:
+                builder(*arguments)
+            except Exception as error:
+                # A failing figure is left to the sessions, which show the error
+                self.failed += 1
+                self._log(builder=builder.__name__, arguments=arguments, error=repr(error))
+            self.done += 1
+            if index + 1 < len(self.jobs) and self.jobs[index + 1][0] != group:
+                self._log()
+            # Also gives the sessions the interpreter between two builders
+            self._cancelled.wait(self.pause)
+
+        self.current = None
+        self.state = 'done' if self.done == len(self.jobs) else 'cancelled'
+        # The last line also stands for the last group
+        self._log()